@@ -1,21 +1,69 @@
 from dotenv import load_dotenv
 load_dotenv()  # Load .env file before other imports
 
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
-from app.routers import upload, quiz, hint
+from app.routers import upload, quiz, hint, jobs, figures, bank
+from app.services.figure_store import (
+    FIGURE_GC_INTERVAL_SECONDS,
+    collect_garbage,
+    figure_names,
+)
+from app.services import figure_renderer, metrics
+from app.services.hint_cache import hint_cache
+from app.services.hint_generator import get_provider
+from app.services.ingest_cache import ingest_cache
+from app.services.jobs import job_manager
+from app.services.payload_cache import quiz_payloads
+from app.services.question_bank import question_bank
+from app.services.question_set import question_sets, session_memory
+from app.services.session_store import session_store
+from app.services.spool import UPLOAD_MAX_BYTES, cleanup_stale_spool
 
 # Create uploads directory if it doesn't exist
 UPLOADS_DIR = Path(__file__).parent.parent / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
 
+logger = logging.getLogger(__name__)
+
+
+def collect_figures() -> None:
+    keep = figure_names(ingest_cache.figure_urls()) | question_bank.referenced_figures()
+    collect_garbage(session_store.exists, keep)
+
+
+async def figure_gc_loop():
+    # 🧹 Drop figure files no live session, cached parse or bank question still references
+    while True:
+        await asyncio.sleep(FIGURE_GC_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(collect_figures)
+        except Exception as e:
+            logger.warning("Figure GC failed: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    cleanup_stale_spool(UPLOADS_DIR)
+    gc_task = asyncio.create_task(figure_gc_loop())
+    yield
+    gc_task.cancel()
+    job_manager.shutdown()
+
+
 app = FastAPI(
     title="GATE Quiz Generator API",
     description="API for parsing GATE exam PDFs and generating interactive quizzes",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Serve extracted figures and static assets
@@ -25,6 +73,9 @@ app.mount(
     name="assets"
 )
 
+# ⏱️ Server-Timing header + latency histograms (outermost, so it times everything)
+app.add_middleware(metrics.TimingMiddleware)
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -34,10 +85,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    # Refuse before the multipart body is read (two PDFs + form overhead)
+    if request.url.path == "/api/upload":
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > 2 * UPLOAD_MAX_BYTES + 64 * 1024:
+            return JSONResponse(status_code=413, content={"detail": "Upload too large"})
+    return await call_next(request)
+
+
+metrics.register_stats("ingest_cache", ingest_cache.stats)
+metrics.register_stats("sessions", session_store.stats)
+metrics.register_stats("quiz_payloads", quiz_payloads.stats)
+metrics.register_stats("hint_cache", hint_cache.stats)
+metrics.register_stats("figures", lambda: figure_renderer.stats)
+metrics.register_stats("question_bank", question_bank.stats)
+
+
 # Include routers
 app.include_router(upload.router, prefix="/api", tags=["upload"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
 app.include_router(quiz.router, prefix="/api", tags=["quiz"])
 app.include_router(hint.router, prefix="/api", tags=["hint"])
+app.include_router(figures.router, prefix="/api", tags=["figures"])
+app.include_router(bank.router, prefix="/api", tags=["bank"])
 
 
 @app.get("/")
@@ -45,6 +118,42 @@ async def root():
     return {"message": "GATE Quiz Generator API", "status": "running"}
 
 
+# Stats read SQLite-backed stores: plain def routes run in the thread pool
+
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+def health_check():
+    return {
+        "status": "healthy",
+        "ingest_cache": ingest_cache.stats(),
+        "sessions": session_store.stats(),
+        "quiz_payloads": quiz_payloads.stats(),
+        "hint_cache": hint_cache.stats(),
+        "hints": {"model": get_provider().model, "available": get_provider().available},
+        "figures": figure_renderer.stats,
+        "question_bank": question_bank.stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/debug/sessions")
+async def debug_sessions():
+    """Session memory: live sessions, distinct question sets and bytes per session."""
+    count, stored = session_store.size()
+    return {
+        "sessions": count,
+        "bytes": stored,
+        "bytes_per_session": stored // count if count else 0,
+        "question_sets": question_sets.stats(),
+    }
+
+
+@app.get("/debug/sessions/{session_id}")
+async def debug_session(session_id: str):
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Quiz session not found")
+    return {"session_id": session_id, **session_memory(session, session_store.shared_by(session))}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Union
+from typing import Any, Optional, Union
 from enum import Enum
 
 
@@ -10,6 +10,15 @@ class QuestionType(str, Enum):
     NAT_DECIMAL = "nat_decimal"
 
 
+class FigureImage(BaseModel):
+    """One figure in several sizes, ready for <picture>/<img srcset>."""
+    src: str  # full-size PNG, works everywhere
+    srcset: str  # WebP variants with width descriptors ("url 320w, ...")
+    fallback_srcset: str  # the same sizes as PNG
+    width: int
+    height: int
+
+
 class Question(BaseModel):
     number: int
     text: str
@@ -17,7 +26,8 @@ class Question(BaseModel):
     options: Optional[dict[str, str]] = None
     correct_answer: Union[str, list[str], int, float, tuple[float, float], None] = None
     images: Optional[list[str]] = None
-    # images → list of URLs like "/assets/figures/fig_xxx.png"
+    # images → list of URLs like "/api/figures/fig_xxx.png"
+    figures: Optional[list[FigureImage]] = None  # same figures, all variants
 
 
 class QuestionResponse(BaseModel):
@@ -27,6 +37,7 @@ class QuestionResponse(BaseModel):
     question_type: QuestionType
     options: Optional[dict[str, str]] = None
     images: Optional[list[str]] = None
+    figures: Optional[list[FigureImage]] = None
 
 
 class QuizSession(BaseModel):
@@ -70,10 +81,89 @@ class QuizResult(BaseModel):
     results: list[QuestionResult]
 
 
-class UploadResponse(BaseModel):
+class QuestionReviewPage(BaseModel):
+    """A page of per-question results (with correct answers) for review mode"""
+    session_id: str
+    total: int
+    offset: int
+    limit: int
+    results: list[dict[str, Any]]
+
+
+class NatAnswerStats(BaseModel):
+    count: int
+    mean: float
+    stdev: float
+    min: float
+    max: float
+    values: dict[str, int]  # most common answers
+    other: int  # answers outside the tracked values
+
+
+class QuestionStats(BaseModel):
+    question_number: int
+    question_type: QuestionType
+    attempts: int
+    correct: int
+    unattempted: int
+    correct_rate: Optional[float] = None  # correct / attempts
+    choices: Optional[dict[str, int]] = None  # MCQ/MSQ option histogram
+    nat: Optional[NatAnswerStats] = None
+
+
+class SessionStatsResponse(BaseModel):
+    """Aggregated answers of every submission to a session"""
+    session_id: str
+    submissions: int
+    mean_score_percentage: Optional[float] = None
+    questions: list[QuestionStats]
+
+
+class AnswerSheet(BaseModel):
+    """One student's answers in a batch submission"""
+    student_id: Optional[str] = None
+    answers: list[AnswerSubmission]
+
+
+class BatchSubmission(BaseModel):
+    sheets: list[AnswerSheet]
+    include_results: bool = False  # per-question correctness for every sheet
+
+
+class SheetScore(BaseModel):
+    student_id: Optional[str] = None
+    attempted: int
+    correct: int
+    incorrect: int
+    unattempted: int
+    score_percentage: float
+    is_correct: Optional[list[bool]] = None  # in question_numbers order
+
+
+class BatchQuizResult(BaseModel):
     session_id: str
     total_questions: int
-    message: str
+    question_numbers: list[int]
+    sheets: list[SheetScore]
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobResponse(BaseModel):
+    """State of a background parse job (returned by upload and job polling)"""
+    job_id: str
+    status: JobStatus
+    stage: Optional[str] = None
+    pages_done: int = 0
+    pages_total: int = 0
+    session_id: Optional[str] = None
+    total_questions: Optional[int] = None
+    error: Optional[str] = None
 
 
 class ParsedAnswerKey(BaseModel):
@@ -88,3 +178,67 @@ class HintResponse(BaseModel):
     question_number: int
     hint: str
     cached: bool
+
+
+class SessionHintsResponse(BaseModel):
+    """All hints already generated for a session"""
+    session_id: str
+    hints: list[HintResponse]
+    missing: list[int]
+
+
+class BankPaper(BaseModel):
+    """A paper whose questions are in the question bank"""
+    id: str
+    source: Optional[str] = None  # uploaded file name
+    question_count: int
+    added_at: float
+
+
+class BankQuestion(BaseModel):
+    """A question bank search hit (without correct answer)"""
+    id: int
+    paper_id: str
+    canonical_id: Optional[int] = None  # id of the first-seen near-duplicate (its own id if none)
+    number: int  # number within its paper
+    text: str
+    question_type: QuestionType
+    options: Optional[dict[str, str]] = None
+    images: Optional[list[str]] = None
+    figures: Optional[list[FigureImage]] = None
+    snippet: Optional[str] = None  # matched text with [brackets] around the hits
+
+
+class BankSearchResponse(BaseModel):
+    total: int
+    offset: int
+    limit: int
+    results: list[BankQuestion]
+
+
+class DuplicateCluster(BaseModel):
+    """Near-duplicate copies of one question across papers"""
+    canonical_id: int
+    size: int
+    questions: list[BankQuestion]
+
+
+class DuplicateClustersResponse(BaseModel):
+    total: int
+    offset: int
+    limit: int
+    clusters: list[DuplicateCluster]
+
+
+class BankQuizRequest(BaseModel):
+    """Compose a quiz session from question bank matches"""
+    query: Optional[str] = None  # full-text query over question text and options
+    question_types: Optional[list[QuestionType]] = None
+    paper_ids: Optional[list[str]] = None
+    limit: int = 30
+    shuffle: bool = False
+
+
+class BankQuizResponse(BaseModel):
+    session_id: str
+    total_questions: int
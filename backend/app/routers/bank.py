@@ -0,0 +1,91 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.models import (
+    BankPaper,
+    BankQuizRequest,
+    BankQuizResponse,
+    BankSearchResponse,
+    DuplicateCluster,
+    DuplicateClustersResponse,
+    QuestionType,
+)
+from app.routers.upload import create_session
+from app.services.question_bank import question_bank
+from app.services.question_set import question_sets
+
+# Bank queries hit SQLite/FTS5: every route is a plain def, run in the thread pool
+router = APIRouter()
+
+BANK_PAGE_MAX = 100
+BANK_QUIZ_MAX = 200
+
+
+@router.get("/bank/papers", response_model=list[BankPaper])
+def list_papers():
+    """Every paper in the question bank."""
+    return question_bank.papers()
+
+
+@router.delete("/bank/papers/{paper_id}", status_code=204)
+def delete_paper(paper_id: str):
+    if not question_bank.delete_paper(paper_id):
+        raise HTTPException(status_code=404, detail="Paper not found")
+
+
+@router.get("/bank/questions", response_model=BankSearchResponse)
+def search_questions(
+    q: Optional[str] = Query(None, description="Full-text query over question text and options"),
+    question_type: Optional[list[QuestionType]] = Query(None, alias="type"),
+    paper: Optional[list[str]] = Query(None, description="Restrict to these paper ids"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=BANK_PAGE_MAX),
+):
+    """
+    Search every question parsed so far, best matches first.
+    Correct answers are not included.
+    """
+    total, results = question_bank.search(q, question_type, paper, limit, offset)
+    return BankSearchResponse(total=total, offset=offset, limit=limit, results=results)
+
+
+@router.get("/bank/duplicates", response_model=DuplicateClustersResponse)
+def list_duplicates(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=BANK_PAGE_MAX),
+):
+    """
+    Questions that appear (near-)verbatim in more than one place, grouped
+    by canonical question id; largest clusters first.
+    """
+    total, clusters = question_bank.duplicate_clusters(limit, offset)
+    return DuplicateClustersResponse(
+        total=total,
+        offset=offset,
+        limit=limit,
+        clusters=[
+            DuplicateCluster(canonical_id=canonical_id, size=len(members), questions=members)
+            for canonical_id, members in clusters
+        ],
+    )
+
+
+@router.post("/bank/quiz", response_model=BankQuizResponse, status_code=201)
+def compose_quiz(request: BankQuizRequest):
+    """
+    Create a quiz session from question bank matches, without parsing
+    any PDF. Near-duplicates are included once; questions are renumbered
+    1..n in the new session.
+    """
+    if not 1 <= request.limit <= BANK_QUIZ_MAX:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {BANK_QUIZ_MAX}")
+
+    questions = question_bank.compose(
+        request.query, request.question_types, request.paper_ids, request.limit, request.shuffle
+    )
+    if not questions:
+        raise HTTPException(status_code=404, detail="No questions match")
+
+    session = create_session(question_sets.intern(questions))
+    return BankQuizResponse(session_id=session.id, total_questions=session.total_questions)
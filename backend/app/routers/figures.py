@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from app.services.figure_renderer import FigureNotFoundError, get_figure
+
+router = APIRouter()
+
+
+@router.get("/figures/{name}")
+async def get_figure_image(name: str):
+    """
+    Serve a question figure variant, rendering it from the paper on first request.
+
+    Figure names are derived from the paper content and clip, so a response
+    never changes and can be cached forever.
+    """
+    try:
+        path = await get_figure(name)
+    except FigureNotFoundError:
+        raise HTTPException(status_code=404, detail="Figure not found")
+
+    return FileResponse(
+        path,
+        media_type="image/webp" if name.endswith(".webp") else "image/png",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"},
+    )
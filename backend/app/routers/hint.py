@@ -1,8 +1,10 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 
-from app.models import HintResponse
+from app.models import HintResponse, SessionHintsResponse
 from app.routers.upload import get_session
-from app.services.hint_generator import generate_hint
+from app.services.hint_generator import generate_hint, get_cached_hints
+from app.services.hint_provider import HintsUnavailableError
 
 router = APIRouter()
 
@@ -15,33 +17,57 @@ async def get_hint(
     """
     Get a hint for a specific question using Google Gemini API.
 
-    Hints are cached per session to avoid repeated API calls.
+    Hints are cached by question content (across sessions and restarts)
+    to avoid repeated API calls.
     """
     session = get_session(session_id)
 
-    # Find the question
-    question = None
-    for q in session.questions:
-        if q.number == question_number:
-            question = q
-            break
-
+    question = session.question(question_number)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
     try:
-        hint_text, is_cached = await generate_hint(
-            question=question,
-            session_id=session_id,
-        )
+        hint_text, is_cached = await generate_hint(question)
 
         return HintResponse(
             question_number=question_number,
             hint=hint_text,
             cached=is_cached
         )
+    except HintsUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Hints are not available: {e}"
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail="Hint provider timed out"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate hint: {str(e)}"
         )
+
+
+# Plain def: the session and hint cache lookups are SQLite, run in the thread pool
+@router.get("/quiz/{session_id}/hints", response_model=SessionHintsResponse)
+def get_session_hints(session_id: str):
+    """
+    Get every hint already available for a session in one response.
+
+    Never calls the LLM; questions without a cached hint are listed in
+    ``missing`` and can be requested individually.
+    """
+    session = get_session(session_id)
+    hints = get_cached_hints(session.questions)
+
+    return SessionHintsResponse(
+        session_id=session_id,
+        hints=[
+            HintResponse(question_number=number, hint=hint, cached=True)
+            for number, hint in sorted(hints.items())
+        ],
+        missing=[q.number for q in session.questions if q.number not in hints],
+    )
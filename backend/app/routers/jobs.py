@@ -0,0 +1,52 @@
+import asyncio
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.models import JobResponse
+from app.services.jobs import Job, job_manager
+
+router = APIRouter()
+
+# How often the event stream checks a job for changes
+EVENT_POLL_SECONDS = 0.2
+
+
+def get_job(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job_status(job_id: str):
+    """
+    Get the progress of an upload parse job.
+    Once status is "done" the response carries the quiz session id.
+    """
+    return get_job(job_id).to_response()
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Server-sent events stream of job progress.
+    Emits one event per change and closes after the final (done/failed) event.
+    """
+    job = get_job(job_id)
+
+    async def events():
+        last_version = -1
+        while True:
+            if job.version != last_version:
+                last_version = job.version
+                yield f"data: {job.to_response().model_dump_json()}\n\n"
+                if job.finished:
+                    return
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
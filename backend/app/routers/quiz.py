@@ -1,40 +1,138 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
 from app.models import (
+    NatAnswerStats,
+    Question,
+    QuestionStats,
+    SessionStatsResponse,
+    QuestionReviewPage,
+    JobStatus,
     QuizSessionResponse,
     QuestionResponse,
     QuizSubmission,
-    QuizResult
+    QuizResult,
+    BatchSubmission,
+    BatchQuizResult,
 )
 from app.routers.upload import get_session
+from app.services.jobs import job_manager
+from app.services.payload_cache import payload_response, quiz_payloads
+from app.services.quiz_stats import CHOICE_TYPES, quiz_stats
 from app.services.scorer import score_quiz
+from app.services.session_store import session_store
 
 router = APIRouter()
 
+# How often a quiz stream checks a running parse job for new questions
+STREAM_POLL_SECONDS = 0.1
+
+
+def question_response(q: Question) -> QuestionResponse:
+    """A question as students see it (no correct answer)."""
+    return QuestionResponse(
+        number=q.number,
+        text=q.text,
+        question_type=q.question_type,
+        options=q.options,
+        images=q.images,  # ✅ COMMA FIX IS HERE
+        figures=q.figures,
+    )
+
+
+def build_quiz_payload(session_id: str) -> bytes:
+    """Public (answer-free) JSON of a session's questions."""
+    session = get_session(session_id)
+
+    return QuizSessionResponse(
+        id=session.id,
+        questions=[question_response(q) for q in session.questions],
+        total_questions=session.total_questions
+    ).model_dump_json().encode()
+
 
 @router.get("/quiz/{session_id}", response_model=QuizSessionResponse)
-async def get_quiz(session_id: str):
+async def get_quiz(session_id: str, request: Request):
     """
     Get quiz questions for a session.
     Returns questions without correct answers.
+
+    A session's questions never change, so the payload is serialized and
+    gzipped once and revalidated with its ETag (If-None-Match → 304).
+    Serving it from cache still counts as an access to the session.
     """
-    session = get_session(session_id)
+    if not session_store.touch(session_id):
+        raise HTTPException(status_code=404, detail="Quiz session not found")
 
-    question_responses = [
-        QuestionResponse(
-            number=q.number,
-            text=q.text,
-            question_type=q.question_type,
-            options=q.options,
-            images=q.images,  # ✅ COMMA FIX IS HERE
-        )
-        for q in session.questions
-    ]
+    payload = quiz_payloads.get_or_build(session_id, lambda: build_quiz_payload(session_id))
+    return payload_response(payload, request)
 
-    return QuizSessionResponse(
-        id=session.id,
-        questions=question_responses,
-        total_questions=session.total_questions
+
+@router.get("/quiz/{quiz_id}/stream")
+async def stream_quiz(quiz_id: str):
+    """
+    Stream a quiz's questions as NDJSON, one question per line as soon as
+    it is parsed, then a final line with the session id:
+
+        {"type": "question", "question": {...}}
+        {"type": "done", "session_id": "...", "total_questions": 65}
+
+    ``quiz_id`` is a session id, or the job id returned by POST /upload:
+    the first questions then arrive while the rest of the paper is still
+    being parsed. A failed parse ends with {"type": "error", "detail": ...}.
+
+    A streamed question whose stored version turns out different is sent
+    again before "done"; the later line for a number replaces the earlier.
+    """
+    job = job_manager.get(quiz_id)
+    if job is None and not session_store.exists(quiz_id):
+        raise HTTPException(status_code=404, detail="Quiz session not found")
+
+    def line(data: dict) -> str:
+        return json.dumps(data) + "\n"
+
+    def question_line(q: Question) -> str:
+        return f'{{"type": "question", "question": {question_response(q).model_dump_json()}}}\n'
+
+    async def lines() -> AsyncIterator[str]:
+        sent: dict[int, QuestionResponse] = {}
+        session_id = quiz_id
+
+        if job is not None:
+            seen = 0
+            while not job.finished:
+                partial = job.partial
+                for q in partial[seen:]:
+                    sent[q.number] = question_response(q)
+                    yield question_line(q)
+                seen = len(partial)
+                await asyncio.sleep(STREAM_POLL_SECONDS)
+
+            if job.status == JobStatus.FAILED:
+                yield line({"type": "error", "detail": job.error})
+                return
+            session_id = job.session_id
+
+        # Whatever wasn't streamed yet (cached uploads, finished sessions),
+        # or was streamed differently, comes from the session, which is authoritative
+        session = session_store.get(session_id)
+        if session is None:
+            yield line({"type": "error", "detail": "Quiz session not found"})
+            return
+        for q in session.questions:
+            if sent.get(q.number) != question_response(q):
+                yield question_line(q)
+        yield line({"type": "done", "session_id": session.id, "total_questions": session.total_questions})
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"},
     )
 
 
@@ -50,10 +148,129 @@ async def submit_quiz(session_id: str, submission: QuizSubmission):
         questions=session.questions,
         submissions=submission.answers
     )
+    await run_in_threadpool(quiz_stats.record, session_id, result)
 
     return result
 
 
+@router.get("/quiz/{session_id}/stats", response_model=SessionStatsResponse)
+async def get_quiz_stats(session_id: str):
+    """
+    Cohort analytics for a session: per-question correct rates, option
+    histograms and NAT answer distributions over all submissions so far.
+    """
+    if not session_store.exists(session_id):
+        raise HTTPException(status_code=404, detail="Quiz session not found")
+
+    stats = await run_in_threadpool(quiz_stats.get, session_id)
+    if stats is None:
+        return SessionStatsResponse(session_id=session_id, submissions=0, questions=[])
+
+    questions = []
+    for number, agg in sorted(stats.questions.items()):
+        nat = agg.nat
+        questions.append(QuestionStats(
+            question_number=number,
+            question_type=agg.question_type,
+            attempts=agg.attempts,
+            correct=agg.correct,
+            unattempted=agg.unattempted,
+            correct_rate=round(agg.correct / agg.attempts, 4) if agg.attempts else None,
+            choices=dict(sorted(agg.choices.items())) if agg.question_type in CHOICE_TYPES else None,
+            nat=NatAnswerStats(
+                count=nat.count,
+                mean=nat.mean,
+                stdev=nat.stdev,
+                min=nat.min,
+                max=nat.max,
+                values=dict(nat.values.most_common(10)),
+                other=nat.other + sum(n for _, n in nat.values.most_common()[10:]),
+            ) if nat.count else None,
+        ))
+
+    return SessionStatsResponse(
+        session_id=session_id,
+        submissions=stats.submissions,
+        mean_score_percentage=round(stats.score_sum / stats.submissions, 2),
+        questions=questions,
+    )
+
+
+@router.post("/quiz/{session_id}/submit/batch", response_model=BatchQuizResult)
+async def submit_quiz_batch(session_id: str, submission: BatchSubmission):
+    """
+    Score many answer sheets (e.g. a whole mock-test cohort) in one request.
+    Each sheet is scored exactly like /submit and counts towards /stats.
+    """
+    # NumPy is only needed here; importing it on first use keeps it out of startup
+    from app.services.batch_scorer import score_batch
+
+    session = get_session(session_id)
+
+    def score_and_record() -> BatchQuizResult:
+        # Per-question outcomes are needed for the cohort stats either way
+        result = score_batch(
+            session_id=session_id,
+            questions=session.questions,
+            sheets=submission.sheets,
+            include_results=True,
+        )
+        quiz_stats.record_batch(session_id, session.questions, submission.sheets, result)
+        if not submission.include_results:
+            for sheet in result.sheets:
+                sheet.is_correct = None
+        return result
+
+    return await run_in_threadpool(score_and_record)
+
+
+# Fields a review result can carry (see GET /quiz/{session_id}/results)
+REVIEW_FIELDS = ("number", "text", "question_type", "options", "images", "figures", "correct_answer")
+REVIEW_PAGE_MAX = 200
+
+
+def question_review(q: Question, fields: tuple[str, ...] = REVIEW_FIELDS) -> dict:
+    review = {
+        "number": q.number,
+        "text": q.text,
+        "question_type": q.question_type,
+        "options": q.options,
+        "images": q.images,
+        "figures": q.figures,
+        "correct_answer": q.correct_answer
+    }
+    return {f: review[f] for f in fields}
+
+
+@router.get("/quiz/{session_id}/results", response_model=QuestionReviewPage)
+async def get_question_results(
+    session_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of result fields"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(REVIEW_PAGE_MAX, ge=1, le=REVIEW_PAGE_MAX),
+):
+    """
+    Get review details (including correct answers) for many questions in
+    one call, optionally restricted to some fields and paginated.
+    """
+    session = get_session(session_id)
+
+    selected = REVIEW_FIELDS
+    if fields:
+        selected = tuple(f.strip() for f in fields.split(",") if f.strip())
+        unknown = [f for f in selected if f not in REVIEW_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    return QuestionReviewPage(
+        session_id=session_id,
+        total=len(session.questions),
+        offset=offset,
+        limit=limit,
+        results=[question_review(q, selected) for q in session.questions[offset:offset + limit]],
+    )
+
+
 @router.get("/quiz/{session_id}/results/{question_number}")
 async def get_question_result(session_id: str, question_number: int):
     """
@@ -62,15 +279,8 @@ async def get_question_result(session_id: str, question_number: int):
     """
     session = get_session(session_id)
 
-    for q in session.questions:
-        if q.number == question_number:
-            return {
-                "number": q.number,
-                "text": q.text,
-                "question_type": q.question_type,
-                "options": q.options,
-                "images": q.images,
-                "correct_answer": q.correct_answer
-            }
-
-    raise HTTPException(status_code=404, detail="Question not found")
+    q = session.question(question_number)
+    if q is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    return question_review(q)
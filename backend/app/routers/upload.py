@@ -1,65 +1,165 @@
+import asyncio
+import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-
-from app.models import UploadResponse, QuizSession
-from app.services.answer_key_parser import extract_answer_key_from_table
-from app.services.question_extractor import extract_questions_from_pdf
-from app.services.figure_extractor import extract_figures
+from typing import TYPE_CHECKING
+
+from fastapi import APIRouter, UploadFile, File, HTTPException
+
+from app.models import JobResponse
+from app.services.figure_store import (
+    FIGURES_URL_PREFIX, PAPERS_DIR, figure_refs, figures_available, question_figure_names,
+)
+from app.services.hint_generator import schedule_prefetch, share_hints
+from app.services.ingest_cache import ingest_cache, ingest_key
+from app.services.jobs import Job, job_manager
+from app.services.metrics import stage_timer
+from app.services.question_bank import question_bank
+from app.services.question_set import CompactSession, QuestionSet, question_sets
+from app.services.session_store import session_store
+from app.services.spool import UploadTooLargeError, discard, retain, spool_upload
+
+if TYPE_CHECKING:
+    from app.services.ingest import IngestResult
 
 router = APIRouter()
 
-quiz_sessions: dict[str, QuizSession] = {}
-
 UPLOADS_DIR = Path(__file__).parent.parent.parent / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
 
+logger = logging.getLogger(__name__)
+
+# Papers are banked after their upload completes, one at a time, off the job callback thread
+_bank_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="question-bank")
+
+
+def create_session(question_set: QuestionSet) -> CompactSession:
+    session = CompactSession(str(uuid.uuid4()), question_set)
+    session_store.put(session)
+    figure_refs.add(session.id, question_figure_names(question_set.questions))
+    return session
+
+
+def bank_paper(paper_id: str, result: "IngestResult", source: str, digest: str) -> None:
+    """
+    Keep a parsed paper for quizzes composed from the bank later and find
+    the questions already seen in other papers. Those with the same answer
+    and options use the earlier copy's hint, and figures pixel-identical to
+    the earlier copy's are served from the files already rendered for it.
+
+    Runs on the bank writer after the upload completed; failures are logged.
+    """
+    try:
+        canonical = question_bank.add_paper(
+            paper_id, result.questions, result.answer_key, source=source, digest=digest,
+        )
+
+        share_hints([(q, canonical[q.number]) for q in result.questions if q.number in canonical])
+
+        pairs = []
+        for q in result.questions:
+            c = canonical.get(q.number)
+            if c is None or not q.images or not c.images or len(q.images) != len(c.images):
+                continue
+            pairs += [
+                (url[len(FIGURES_URL_PREFIX):], other[len(FIGURES_URL_PREFIX):])
+                for url, other in zip(q.images, c.images)
+                if url.startswith(FIGURES_URL_PREFIX) and other.startswith(FIGURES_URL_PREFIX)
+            ]
+        if pairs:
+            from app.services.figure_extractor import verify_duplicate_figures
+
+            verify_duplicate_figures(pairs)
+    except Exception as e:
+        logger.warning("Question bank update failed: %s", e)
+
 
-@router.post("/upload", response_model=UploadResponse)
+def wait_for_bank_writes() -> None:
+    """Block until every paper queued so far is banked (benchmarks, tests)."""
+    _bank_writer.submit(lambda: None).result()
+
+
+@router.post("/upload", response_model=JobResponse, status_code=202)
 async def upload_pdfs(
     questions_pdf: UploadFile = File(...),
     answer_key_pdf: UploadFile = File(...),
-    background_tasks: BackgroundTasks = None,
 ):
+    """
+    Queue a parse job for a question paper + answer key.
+
+    Returns immediately with a job id; poll GET /api/jobs/{job_id}
+    (or stream /api/jobs/{job_id}/events) for progress and the session id.
+    """
     for pdf_file in [questions_pdf, answer_key_pdf]:
         if not pdf_file.filename.lower().endswith(".pdf"):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
-    session_id = str(uuid.uuid4())
-    questions_path = UPLOADS_DIR / f"{session_id}_questions.pdf"
-    answer_key_path = UPLOADS_DIR / f"{session_id}_answers.pdf"
-
-    questions_path.write_bytes(await questions_pdf.read())
-    answer_key_path.write_bytes(await answer_key_pdf.read())
-
-    answer_key = extract_answer_key_from_table(answer_key_path)
-    if not answer_key:
-        raise HTTPException(status_code=422, detail="Answer key parsing failed")
-
-    questions = extract_questions_from_pdf(questions_path, answer_key)
-    if not questions:
-        raise HTTPException(status_code=422, detail="Question parsing failed")
-
-    session = QuizSession(
-        id=session_id,
-        questions=questions,
-        total_questions=len(questions),
+    loop = asyncio.get_running_loop()
+    job = job_manager.create()
+
+    # Stream both files to disk (hashing on the way) instead of reading them into memory
+    spooled = []
+    try:
+        with stage_timer("upload.spool"):
+            for pdf_file, suffix in [(questions_pdf, "questions"), (answer_key_pdf, "answers")]:
+                spooled.append(await spool_upload(pdf_file, UPLOADS_DIR / f"{job.id}_{suffix}.pdf"))
+    except UploadTooLargeError as e:
+        discard(*spooled)
+        job_manager.fail(job, str(e))
+        raise HTTPException(status_code=413, detail=str(e))
+
+    questions_file, answer_key_file = spooled
+    cache_key = ingest_key(questions_file.digest, answer_key_file.digest)
+
+    # The paper outlives the job: figures are rendered from it on first view
+    questions_file = retain(questions_file, PAPERS_DIR)
+
+    # ⚡ Same paper + key already parsed → no PDF work at all
+    # (unless figure GC removed regions the cached questions point at)
+    cached = ingest_cache.get(cache_key)
+    if cached and figures_available(url for q in cached.questions for url in (q.images or [])):
+        discard(answer_key_file)
+        session = create_session(cached.questions)
+        job_manager.complete(job, session.id, session.total_questions)
+        schedule_prefetch(session.questions, loop)
+        return job.to_response()
+
+    # The parsing pipeline (PyMuPDF, pdfplumber) loads on the first parse, not at startup
+    from app.services.ingest import IngestError, ingest_papers
+
+    def on_result(job: Job, result: "IngestResult") -> None:
+        discard(answer_key_file)
+
+        # One shared, compact copy of the questions for every session of this paper
+        question_set = question_sets.intern(result.questions)
+        session = create_session(question_set)
+        ingest_cache.put(cache_key, question_set, result.answer_key, result.figures)
+        job_manager.complete(job, session.id, session.total_questions)
+        schedule_prefetch(session.questions, loop)
+
+        # 📚 Banking and duplicate detection stay off the upload's critical path
+        _bank_writer.submit(bank_paper, cache_key, result, questions_pdf.filename, question_set.digest)
+
+    def on_error(job: Job, exc: BaseException) -> None:
+        discard(answer_key_file)
+        message = str(exc) if isinstance(exc, IngestError) else "Failed to process PDFs"
+        job_manager.fail(job, message)
+
+    job_manager.submit(
+        job,
+        ingest_papers,
+        questions_file.path,
+        answer_key_file.path,
+        on_result=on_result,
+        on_error=on_error,
     )
-    quiz_sessions[session_id] = session
-
-    # 🔥 Run figure extraction in background
-    background_tasks.add_task(extract_figures, questions_path)
 
-    return UploadResponse(
-        session_id=session_id,
-        total_questions=len(questions),
-        message="Quiz ready. Figures are loading in background."
-    )
+    return job.to_response()
 
 
-def get_session(session_id: str) -> QuizSession:
-    if session_id not in quiz_sessions:
+def get_session(session_id: str) -> CompactSession:
+    session = session_store.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Quiz session not found")
-    return quiz_sessions[session_id]
-
-
+    return session
@@ -1,9 +1,12 @@
+import bisect
 import re
 from pathlib import Path
-from typing import Union
-import pdfplumber
+from typing import Callable, Optional, Union
+import fitz  # PyMuPDF
 
 from app.models import QuestionType, ParsedAnswerKey
+from app.services.metrics import stage_timer
+from app.services.page_pool import map_page_ranges
 
 
 def parse_answer_value(answer_str: str, qtype: str):
@@ -34,46 +37,253 @@ def parse_answer_value(answer_str: str, qtype: str):
     raise ValueError("Unknown question type")
 
 
-def extract_answer_key_from_table(pdf_path: Path) -> dict[int, ParsedAnswerKey]:
+# Header cells of the answer key table (lower-cased)
+HEADER_QNO, HEADER_TYPE, HEADER_KEY = "q. no.", "q. type", "key/range"
+ANSWER_TYPES = {"MCQ", "MSQ", "NAT"}
+
+
+class IrregularLayoutError(Exception):
+    """Raised when the text layer can't be read as a plain one-line-per-row table."""
+
+
+# A word as returned by PyMuPDF: (x0, y0, x1, y1, text, block, line, word)
+Word = tuple
+
+
+def _text_lines(page: fitz.Page) -> list[list[Word]]:
+    """Words of a page grouped into visual lines, top to bottom, left to right."""
+    lines: list[list] = []  # [y_mid, words]
+    for w in sorted(page.get_text("words"), key=lambda w: (w[1] + w[3]) / 2):
+        mid = (w[1] + w[3]) / 2
+        if lines and abs(mid - lines[-1][0]) <= (w[3] - w[1]) / 2:
+            lines[-1][1].append(w)
+        else:
+            lines.append([mid, [w]])
+    return [sorted(words, key=lambda w: w[0]) for _, words in lines]
+
+
+def _header_layout(line: list[Word]) -> Optional[tuple[list[float], int, int, int]]:
+    """
+    Column layout of a header line: boundaries between the columns and the
+    indices of the question number, type and key columns.
+    """
+    cells = []  # [x0, x1, text]; words closer than half a line height share a cell
+    for w in line:
+        if cells and w[0] - cells[-1][1] <= (w[3] - w[1]) / 2:
+            cells[-1][1] = w[2]
+            cells[-1][2] += " " + w[4]
+        else:
+            cells.append([w[0], w[2], w[4]])
+
+    names = [c[2].lower() for c in cells]
+    if not {HEADER_QNO, HEADER_TYPE, HEADER_KEY} <= set(names):
+        return None
+
+    # Midway between neighbouring headers, so left-aligned and centred cells both land right
+    bounds = [(a[1] + b[0]) / 2 for a, b in zip(cells, cells[1:])]
+    return bounds, names.index(HEADER_QNO), names.index(HEADER_TYPE), names.index(HEADER_KEY)
+
+
+def _looks_like_row(line: list[Word]) -> bool:
+    """A line with a question number and an answer type somewhere in it, whatever the columns."""
+    words = [w[4] for w in line]
+    return any(w.isdigit() for w in words) and any(w.upper() in ANSWER_TYPES for w in words)
+
+
+def extract_answer_key_from_text(
+    pdf_path: Path,
+    on_page: Optional[Callable[[int, int], None]] = None,
+) -> dict[int, ParsedAnswerKey]:
+    """
+    Read the answer key table from the text layer, one line per row.
+
+    Column positions come from the header line and carry over to the
+    header-less continuation pages. Reading stops at the first page after
+    the table that has no rows.
+
+    Returns an empty dict when no header is found. Raises
+    IrregularLayoutError for layouts this can't read, so that table
+    detection handles them: cells wrapping onto a second line, rows that
+    don't fit the header's columns (e.g. a continuation page laid out
+    differently) and question numbers that don't run 1..n without gaps.
+    """
     answers = {}
-    col_map = None  # persists across pages
+    numbers = set()  # question numbers of every row read, parsable or not
+    layout = None  # persists across pages
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            for table in page.extract_tables() or []:
-                if not table or len(table) < 2:
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+
+        for page_index in range(page_count):
+            rows = 0
+            last_row_bottom = None
+
+            for line in _text_lines(doc[page_index]):
+                header = _header_layout(line)
+                if header:
+                    layout = header
+                    continue
+                if layout is None:
+                    continue
+
+                bounds, q_col, type_col, key_col = layout
+                cells = [[] for _ in range(len(bounds) + 1)]
+                for w in line:
+                    cells[bisect.bisect(bounds, (w[0] + w[2]) / 2)].append(w[4])
+                qno, qtype, key = (" ".join(cells[i]) for i in (q_col, type_col, key_col))
+
+                top = min(w[1] for w in line)
+                if not (qno.isdigit() and qtype.upper() in ANSWER_TYPES):
+                    if _looks_like_row(line):
+                        raise IrregularLayoutError(f"Answer key row off the header columns on page {page_index + 1}")
+                    # Type/key text right under a row is that row's cell wrapping
+                    height = max(w[3] for w in line) - top
+                    if last_row_bottom is not None and top - last_row_bottom < height and (qtype or key):
+                        raise IrregularLayoutError(f"Wrapped answer key row on page {page_index + 1}")
                     continue
 
-                # Try detecting header
-                header = [c.lower().strip() if c else "" for c in table[0]]
-
-                if "q. no." in header and "q. type" in header:
-                    col_map = {
-                        "q": header.index("q. no."),
-                        "type": header.index("q. type"),
-                        "key": header.index("key/range"),
-                    }
-                    data_rows = table[1:]
-                elif col_map:
-                    # No header → reuse previous mapping
-                    data_rows = table
-                else:
+                rows += 1
+                numbers.add(int(qno))
+                last_row_bottom = max(w[3] for w in line)
+                try:
+                    qt, val = parse_answer_value(key, qtype)
+                except Exception:
                     continue
+                answers[int(qno)] = ParsedAnswerKey(question_number=int(qno), answer_type=qt, answer=val)
 
-                for row in data_rows:
-                    try:
-                        qno = int(row[col_map["q"]])
-                        qtype = row[col_map["type"]]
-                        key = row[col_map["key"]]
+            if on_page:
+                on_page(page_index + 1, page_count)
 
-                        qt, val = parse_answer_value(key, qtype)
+            # ⚡ Table over: don't touch the remaining pages
+            if answers and not rows:
+                if on_page:
+                    on_page(page_count, page_count)
+                break
 
-                        answers[qno] = ParsedAnswerKey(
-                            question_number=qno,
-                            answer_type=qt,
-                            answer=val
-                        )
-                    except Exception:
-                        continue
+    # A missing number means rows this reader didn't see (or misread)
+    if numbers and numbers != set(range(1, max(numbers) + 1)):
+        raise IrregularLayoutError("Answer key question numbers have gaps")
 
     return answers
+
+
+# A table as returned by pdfplumber: rows of (possibly empty) cell strings
+Table = list[list[Optional[str]]]
+
+
+def extract_page_tables(
+    pdf_path: Path,
+    start: int,
+    stop: int,
+    on_page: Optional[Callable[[int], None]] = None,
+) -> list[list[Table]]:
+    """Run table detection on pages [start, stop); one list of tables per page."""
+    import pdfplumber
+
+    pages = []
+
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_index in range(start, stop):
+            pages.append(pdf.pages[page_index].extract_tables() or [])
+            if on_page:
+                on_page(page_index)
+
+    return pages
+
+
+def merge_page_tables(page_tables: list[list[Table]]) -> dict[int, ParsedAnswerKey]:
+    """
+    Turn per-page tables into the answer key.
+
+    Runs serially in page order because the header ``col_map`` found on one
+    page applies to the header-less continuation tables on later pages.
+    """
+    answers = {}
+    col_map = None  # persists across pages
+
+    for tables in page_tables:
+        for table in tables:
+            if not table or len(table) < 2:
+                continue
+
+            # Try detecting header
+            header = [c.lower().strip() if c else "" for c in table[0]]
+
+            if "q. no." in header and "q. type" in header:
+                col_map = {
+                    "q": header.index("q. no."),
+                    "type": header.index("q. type"),
+                    "key": header.index("key/range"),
+                }
+                data_rows = table[1:]
+            elif col_map:
+                # No header → reuse previous mapping
+                data_rows = table
+            else:
+                continue
+
+            for row in data_rows:
+                try:
+                    qno = int(row[col_map["q"]])
+                    qtype = row[col_map["type"]]
+                    key = row[col_map["key"]]
+
+                    qt, val = parse_answer_value(key, qtype)
+
+                    answers[qno] = ParsedAnswerKey(
+                        question_number=qno,
+                        answer_type=qt,
+                        answer=val
+                    )
+                except Exception:
+                    continue
+
+    return answers
+
+
+def extract_answer_key_with_tables(
+    pdf_path: Path,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    workers: Optional[int] = None,
+) -> dict[int, ParsedAnswerKey]:
+    """
+    Parse the answer key table(s) with pdfplumber's table detection.
+
+    Table detection is the expensive part and is fanned out over page
+    ranges (see app.services.page_pool); merging stays serial.
+    """
+    # Imported here: answer keys the text layer can read never need pdfplumber
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+
+    with stage_timer("answer_key.tables"):
+        page_tables = map_page_ranges(extract_page_tables, pdf_path, page_count, on_page, workers)
+    with stage_timer("answer_key.merge"):
+        return merge_page_tables(page_tables)
+
+
+def extract_answer_key_from_table(
+    pdf_path: Path,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    workers: Optional[int] = None,
+    on_table_page: Optional[Callable[[int, int], None]] = None,
+) -> dict[int, ParsedAnswerKey]:
+    """
+    Parse the answer key table(s) of a GATE answer key PDF.
+
+    Regular layouts are read from the text layer (no layout analysis);
+    anything else, including a text read that can't vouch for its
+    completeness, falls back to full table detection.
+
+    The fallback reads every page again, so it reports to ``on_table_page``
+    as a separate stage rather than restarting the text read's count.
+    """
+    try:
+        with stage_timer("answer_key.text"):
+            answers = extract_answer_key_from_text(pdf_path, on_page)
+    except IrregularLayoutError:
+        answers = {}
+
+    return answers or extract_answer_key_with_tables(pdf_path, on_table_page, workers)
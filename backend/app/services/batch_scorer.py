@@ -0,0 +1,273 @@
+import math
+from dataclasses import dataclass
+from typing import Union
+
+import numpy as np
+
+from app.models import AnswerSheet, BatchQuizResult, Question, QuestionType, SheetScore
+from app.services.scorer import NAT_DECIMAL_TOLERANCE, is_attempted, score_answer
+from app.services.metrics import stage_timer
+
+Answer = Union[str, list[str], float, None]
+
+# How each answer-key column is compared
+NEVER = 0  # no usable correct answer: every attempt is wrong
+CHOICE = 1  # MCQ / MSQ: letter bitmasks must be equal
+NAT_INT = 2  # int(float(answer)) == key
+NAT_TOL = 3  # |answer - key| <= NAT_DECIMAL_TOLERANCE
+NAT_RANGE = 4  # lo <= answer <= hi
+PYTHON = 5  # unusual key: score every cell with score_answer
+
+# int(float(x)) outside this range doesn't fit the int64 arrays
+INT_LIMIT = 2 ** 62
+# Ints beyond this lose precision as float64 bounds
+EXACT_FLOAT_INT = 2 ** 53
+
+
+@dataclass
+class CompiledAnswerKey:
+    """A session's answer key as columns, built once per batch."""
+    questions: list[Question]
+    columns: dict[int, int]  # question number -> column
+    kind: np.ndarray  # (Q,) int8, one of the constants above
+    code: np.ndarray  # (Q,) int64: choice bitmask or NAT integer
+    lo: np.ndarray  # (Q,) float64: NAT value / lower bound
+    hi: np.ndarray  # (Q,) float64: NAT upper bound
+
+
+@dataclass
+class BatchScores:
+    """Per-cell outcome of scoring S answer sheets against Q questions."""
+    numbers: list[int]  # question number of each column
+    attempted: np.ndarray  # (S, Q) bool
+    correct: np.ndarray  # (S, Q) bool
+
+    @property
+    def correct_counts(self) -> np.ndarray:
+        return self.correct.sum(axis=1)
+
+    @property
+    def attempted_counts(self) -> np.ndarray:
+        return self.attempted.sum(axis=1)
+
+
+def _letter_mask(choice: str) -> int:
+    """Bit of a single A-Z choice after upper-casing (as score_answer compares), else 0."""
+    upper = choice.upper()
+    if len(upper) == 1 and "A" <= upper <= "Z":
+        return 1 << (ord(upper) - ord("A"))
+    return 0
+
+
+def _choice_key(correct, single: bool) -> tuple[int, int]:
+    """(kind, mask) for an MCQ/MSQ correct answer."""
+    if isinstance(correct, str):
+        mask = _letter_mask(correct)
+        return (CHOICE, mask) if mask else (PYTHON, 0)
+    if single or not isinstance(correct, list):
+        return NEVER, 0
+
+    mask = 0
+    for choice in correct:
+        bit = _letter_mask(choice) if isinstance(choice, str) else 0
+        if not bit or mask & bit:
+            # Non-letter or repeated choice: sorted-list equality needs the slow path
+            return PYTHON, 0
+        mask |= bit
+    return CHOICE, mask
+
+
+def _exact_float(value) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, float):
+        return True
+    return isinstance(value, int) and abs(value) <= EXACT_FLOAT_INT
+
+
+def compile_answer_key(questions: list[Question]) -> CompiledAnswerKey:
+    n = len(questions)
+    kind = np.full(n, NEVER, dtype=np.int8)
+    code = np.zeros(n, dtype=np.int64)
+    lo = np.zeros(n, dtype=np.float64)
+    hi = np.zeros(n, dtype=np.float64)
+
+    for j, q in enumerate(questions):
+        correct = q.correct_answer
+        if correct is None:
+            continue
+
+        if q.question_type in (QuestionType.MCQ_SINGLE, QuestionType.MCQ_MULTIPLE):
+            kind[j], code[j] = _choice_key(correct, q.question_type == QuestionType.MCQ_SINGLE)
+
+        elif q.question_type == QuestionType.NAT_INTEGER:
+            try:
+                value = int(correct)
+            except (ValueError, TypeError):
+                # Still NAT_INT: the answer is converted (and may raise) before the key
+                kind[j], code[j] = NAT_INT, INT_LIMIT
+                continue
+            except OverflowError:
+                kind[j] = PYTHON
+                continue
+            kind[j], code[j] = (NAT_INT, value) if abs(value) < INT_LIMIT else (PYTHON, 0)
+
+        elif q.question_type == QuestionType.NAT_DECIMAL:
+            if isinstance(correct, (list, tuple)) and len(correct) == 2:
+                if _exact_float(correct[0]) and _exact_float(correct[1]):
+                    kind[j], lo[j], hi[j] = NAT_RANGE, correct[0], correct[1]
+                else:
+                    kind[j] = PYTHON
+                continue
+            try:
+                kind[j], lo[j] = NAT_TOL, float(correct)
+            except (ValueError, TypeError):
+                kind[j] = NEVER
+
+    return CompiledAnswerKey(
+        questions=questions,
+        columns={q.number: j for j, q in enumerate(questions)},
+        kind=kind,
+        code=code,
+        lo=lo,
+        hi=hi,
+    )
+
+
+def _encode_choice(answer: Answer, single: bool) -> Union[int, None]:
+    """Bitmask of a submitted choice (0 = can't match), or None for the slow path."""
+    if isinstance(answer, list):
+        if single:
+            if len(answer) != 1:
+                return 0
+            answer = answer[0]
+        else:
+            mask = 0
+            for choice in answer:
+                if not isinstance(choice, str):
+                    return None
+                bit = _letter_mask(choice)
+                if not bit:
+                    return 0
+                if mask & bit:
+                    return None
+                mask |= bit
+            return mask
+    if isinstance(answer, str):
+        return _letter_mask(answer)
+    return 0
+
+
+def _to_float(answer: Answer) -> Union[float, None]:
+    try:
+        return float(answer)
+    except (ValueError, TypeError):
+        return None
+
+
+def score_sheets(key: CompiledAnswerKey, sheets: list[dict[int, Answer]]) -> BatchScores:
+    """
+    Score many answer sheets (question number -> answer) in one pass.
+
+    Answers are encoded into arrays once, then every comparison runs as a
+    NumPy expression over the whole (sheets x questions) grid. Cells the
+    arrays can't represent exactly go through score_answer, so the outcome
+    matches score_quiz cell for cell.
+    """
+    n_sheets, n_questions = len(sheets), len(key.questions)
+    attempted = np.zeros((n_sheets, n_questions), dtype=bool)
+    valid = np.zeros((n_sheets, n_questions), dtype=bool)
+    codes = np.zeros((n_sheets, n_questions), dtype=np.int64)
+    values = np.zeros((n_sheets, n_questions), dtype=np.float64)
+    slow: list[tuple[int, int, Answer]] = []
+
+    kinds = key.kind.tolist()
+    single = [q.question_type == QuestionType.MCQ_SINGLE for q in key.questions]
+
+    for s, answers in enumerate(sheets):
+        for number, answer in answers.items():
+            j = key.columns.get(number)
+            if j is None or not is_attempted(answer):
+                continue
+            attempted[s, j] = True
+            kind = kinds[j]
+
+            if kind == CHOICE:
+                mask = _encode_choice(answer, single[j])
+                if mask is None:
+                    slow.append((s, j, answer))
+                else:
+                    codes[s, j], valid[s, j] = mask, mask != 0
+            elif kind == NAT_INT:
+                value = _to_float(answer)
+                if value is None:
+                    continue
+                if not math.isfinite(value) or abs(value) >= INT_LIMIT:
+                    slow.append((s, j, answer))
+                else:
+                    codes[s, j], valid[s, j] = int(value), True
+            elif kind in (NAT_TOL, NAT_RANGE):
+                value = _to_float(answer)
+                if value is not None:
+                    values[s, j], valid[s, j] = value, True
+            elif kind == PYTHON:
+                slow.append((s, j, answer))
+
+    kind = key.kind
+    exact = (kind == CHOICE) | (kind == NAT_INT)
+    correct = valid & (
+        (exact & (codes == key.code))
+        | ((kind == NAT_TOL) & (np.abs(values - key.lo) <= NAT_DECIMAL_TOLERANCE))
+        | ((kind == NAT_RANGE) & (key.lo <= values) & (values <= key.hi))
+    )
+
+    for s, j, answer in slow:
+        correct[s, j] = score_answer(key.questions[j], answer)
+
+    return BatchScores(
+        numbers=[q.number for q in key.questions],
+        attempted=attempted,
+        correct=correct,
+    )
+
+
+@stage_timer("score.batch")
+def score_batch(
+    session_id: str,
+    questions: list[Question],
+    sheets: list[AnswerSheet],
+    include_results: bool = False,
+) -> BatchQuizResult:
+    """
+    Score a batch of answer sheets; each sheet's counts equal score_quiz's.
+    """
+    key = compile_answer_key(questions)
+    scores = score_sheets(
+        key,
+        [{sub.question_number: sub.answer for sub in sheet.answers} for sheet in sheets],
+    )
+
+    total = len(questions)
+    attempted = scores.attempted_counts.tolist()
+    correct = scores.correct_counts.tolist()
+    rows = scores.correct.tolist() if include_results else None
+
+    results = []
+    for i, sheet in enumerate(sheets):
+        score_percentage = (correct[i] / total * 100) if total > 0 else 0
+        results.append(SheetScore(
+            student_id=sheet.student_id,
+            attempted=attempted[i],
+            correct=correct[i],
+            incorrect=attempted[i] - correct[i],
+            unattempted=total - attempted[i],
+            score_percentage=round(score_percentage, 2),
+            is_correct=rows[i] if rows is not None else None,
+        ))
+
+    return BatchQuizResult(
+        session_id=session_id,
+        total_questions=total,
+        question_numbers=scores.numbers,
+        sheets=results,
+    )
@@ -1,47 +1,177 @@
+import hashlib
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterable, Optional
 import fitz  # PyMuPDF
-from PIL import Image
-import uuid
 
-ASSETS_DIR = Path("backend/assets/figures")
-ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+from app.models import FigureImage
+from app.services.figure_store import (
+    FIGURES_URL_PREFIX, FigureRegion, figure_regions, pixmap_digest, save_pixmap,
+)
+from app.services.metrics import stage_timer
 
-# Cache to avoid reprocessing
-_FIGURE_CACHE: dict[str, dict[int, list[str]]] = {}
+# Render resolution for figure clips
+ZOOM = 1.5  # ≈ 144 DPI, very fast
 
+# Downscaled variants served alongside the full render (max width, px)
+VARIANT_WIDTHS = {"thumb": 320, "display": 800}
+VARIANT_FORMATS = ("webp", "png")
 
-def extract_figures(pdf_path: Path) -> dict[int, list[str]]:
+# Regions closer than this (pt) belong to the same figure
+MERGE_GAP = 8
+# Margin added around a figure so nearby labels aren't cut off
+CLIP_PADDING = 6
+# Smaller regions are rules, underlines or bullets rather than figures
+MIN_FIGURE_SIZE = 24
+# Regions covering most of the page are frames/backgrounds, not figures
+MAX_PAGE_FRACTION = 0.8
+
+
+@dataclass
+class PageFigure:
+    url: str
+    top: float  # y of the figure's top edge, used to assign it to a question
+    region: FigureRegion  # rendered on first request (see render_region)
+    image: FigureImage  # srcset of its size/format variants
+
+
+def _merge_rects(rects: list[fitz.Rect]) -> list[fitz.Rect]:
+    merged: list[fitz.Rect] = []
+    for rect in sorted(rects, key=lambda r: (r.y0, r.x0)):
+        grown = fitz.Rect(rect.x0 - MERGE_GAP, rect.y0 - MERGE_GAP, rect.x1 + MERGE_GAP, rect.y1 + MERGE_GAP)
+        for i, other in enumerate(merged):
+            if grown.intersects(other):
+                merged[i] = other | rect
+                break
+        else:
+            merged.append(fitz.Rect(rect))
+
+    # One merge can make two earlier regions touch; repeat until stable
+    return merged if len(merged) == len(rects) else _merge_rects(merged)
+
+
+def find_figure_regions(page: fitz.Page, blocks: list[tuple]) -> list[fitz.Rect]:
     """
-    Extract figures by rendering pages using PyMuPDF (NO poppler).
-    Fast and Windows-friendly.
+    Locate figures on a page without rendering anything.
+
+    Candidates are embedded images (``get_images``), image blocks from the
+    text pass and clustered vector drawings (``get_drawings``).
     """
-    cache_key = str(pdf_path.resolve())
-    if cache_key in _FIGURE_CACHE:
-        return _FIGURE_CACHE[cache_key]
+    rects: list[fitz.Rect] = []
+
+    for img in page.get_images(full=True):
+        rects.extend(page.get_image_rects(img[0]))
+
+    rects.extend(fitz.Rect(b[:4]) for b in blocks if b[6] == 1)
+    rects.extend(page.cluster_drawings(x_tolerance=MERGE_GAP, y_tolerance=MERGE_GAP))
+
+    page_area = page.rect.width * page.rect.height
+    regions = []
+    for rect in _merge_rects([r for r in rects if not r.is_empty]):
+        if rect.width < MIN_FIGURE_SIZE or rect.height < MIN_FIGURE_SIZE:
+            continue
+        if rect.width * rect.height > MAX_PAGE_FRACTION * page_area:
+            continue
+        padded = fitz.Rect(
+            rect.x0 - CLIP_PADDING, rect.y0 - CLIP_PADDING,
+            rect.x1 + CLIP_PADDING, rect.y1 + CLIP_PADDING,
+        )
+        regions.append(padded & page.rect)
+
+    return sorted(regions, key=lambda r: (r.y0, r.x0))
+
+
+def figure_name(paper: str, page_index: int, clip: fitz.Rect) -> str:
+    """Stable file name for a clip of a paper (papers are stored by content digest)."""
+    key = f"{paper}:{page_index}:{clip.x0:.2f},{clip.y0:.2f},{clip.x1:.2f},{clip.y1:.2f}:{ZOOM}"
+    return f"fig_{hashlib.sha256(key.encode()).hexdigest()[:32]}.png"
 
-    doc = fitz.open(pdf_path)
-    figures: dict[int, list[str]] = {}
 
-    for page_index in range(len(doc)):
-        page = doc[page_index]
+def variant_name(name: str, variant: str, fmt: str) -> str:
+    """fig_<hash>.png → fig_<hash>[.<variant>].<fmt> ("full" has no variant part)."""
+    stem = name.rsplit(".", 1)[0]
+    return f"{stem}.{fmt}" if variant == "full" else f"{stem}.{variant}.{fmt}"
 
-        # Heuristic: pages with figures usually have fewer text blocks
-        text_blocks = page.get_text("blocks")
-        if len(text_blocks) > 20:
-            continue  # likely text-only page
 
-        # Render page (vector → raster)
-        zoom = 1.5  # ≈ 144 DPI, very fast
-        mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
+def variant_zoom(clip: fitz.Rect, variant: str) -> float:
+    """Render zoom for a variant; PyMuPDF renders small sizes directly (no resampling)."""
+    if variant == "full":
+        return ZOOM
+    return min(ZOOM, VARIANT_WIDTHS[variant] / clip.width)
 
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
 
-        # Save entire page as figure (safe + simple)
-        out = ASSETS_DIR / f"fig_{uuid.uuid4().hex}.png"
-        img.save(out)
+def figure_image(name: str, clip: fitz.Rect) -> FigureImage:
+    """srcset-ready description of a figure's variants (all rendered on demand)."""
+    full_width = round(clip.width * ZOOM)
+    sizes = [(v, w) for v, w in VARIANT_WIDTHS.items() if w < full_width] + [("full", full_width)]
 
-        figures[page_index + 1] = [f"/assets/figures/{out.name}"]
+    def srcset(fmt: str) -> str:
+        return ", ".join(f"{FIGURES_URL_PREFIX}{variant_name(name, v, fmt)} {w}w" for v, w in sizes)
 
-    _FIGURE_CACHE[cache_key] = figures
+    return FigureImage(
+        src=FIGURES_URL_PREFIX + name,
+        srcset=srcset("webp"),
+        fallback_srcset=srcset("png"),
+        width=full_width,
+        height=round(clip.height * ZOOM),
+    )
+
+
+def locate_page_figures(page: fitz.Page, blocks: list[tuple], paper: str) -> list[PageFigure]:
+    """
+    Find the figures of a page without rendering them.
+
+    Each figure gets its final URL straight away; the pixels are produced
+    by ``render_region`` the first time that URL is requested.
+    """
+    figures = []
+    for region in find_figure_regions(page, blocks):
+        name = figure_name(paper, page.number, region)
+        figures.append(PageFigure(
+            url=FIGURES_URL_PREFIX + name,
+            top=region.y0,
+            region=FigureRegion(name=name, paper=paper, page=page.number, clip=tuple(region)),
+            image=figure_image(name, region),
+        ))
     return figures
+
+
+@stage_timer("figures.render")
+def render_region(region: FigureRegion, variant: str = "full", fmt: str = "png") -> Path:
+    """Render one variant of a deferred figure into the figure store; returns its file."""
+    clip = fitz.Rect(region.clip)
+    zoom = variant_zoom(clip, variant)
+    with fitz.open(region.paper) as doc:
+        pix = doc[region.page].get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip, alpha=False)
+    return save_pixmap(pix, variant_name(region.name, variant, fmt))
+
+
+@stage_timer("figures.verify")
+def verify_duplicate_figures(pairs: Iterable[tuple[str, str]]) -> int:
+    """
+    Compare the full renders of (figure, canonical copy's figure) pairs and
+    record the pixel digests of both, so a pixel-identical copy is served
+    from the files already rendered for the other (see figure_renderer).
+
+    Figures whose region is gone are skipped. Returns how many pairs matched.
+    """
+    digests: dict[str, Optional[str]] = {}
+
+    def digest(name: str) -> Optional[str]:
+        if name not in digests:
+            region = figure_regions.get(name)
+            digests[name] = None
+            if region is not None and Path(region.paper).exists():
+                with fitz.open(region.paper) as doc:
+                    pix = doc[region.page].get_pixmap(
+                        matrix=fitz.Matrix(ZOOM, ZOOM), clip=fitz.Rect(region.clip), alpha=False,
+                    )
+                digests[name] = pixmap_digest(pix)
+        return digests[name]
+
+    matched = 0
+    for name, canonical in pairs:
+        if name != canonical and digest(name) is not None and digest(name) == digest(canonical):
+            matched += 1
+    figure_regions.set_pixels({name: d for name, d in digests.items() if d is not None})
+    return matched
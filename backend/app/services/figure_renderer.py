@@ -0,0 +1,63 @@
+import asyncio
+import re
+from pathlib import Path
+
+from app.services.figure_store import ASSETS_DIR, figure_regions, figure_stem, link_figure
+
+# fig_<hash>[.thumb|.display].(png|webp)
+FIGURE_NAME = re.compile(r"(fig_[0-9a-f]{32})(?:\.(thumb|display))?\.(png|webp)")
+
+# name -> render in progress; concurrent first requests share one render
+_renders: dict[str, asyncio.Task] = {}
+
+stats = {"hits": 0, "renders": 0, "coalesced": 0, "shared": 0}
+
+
+class FigureNotFoundError(Exception):
+    """Raised when a figure is neither rendered nor renderable."""
+
+
+def _render(name: str) -> Path:
+    stem, variant, fmt = FIGURE_NAME.fullmatch(name).groups()
+    region = figure_regions.get(f"{stem}.png")
+    if region is None or not Path(region.paper).exists():
+        raise FigureNotFoundError(name)
+
+    # A verified pixel-identical copy (the same figure in another paper) already rendered this variant
+    for twin in figure_regions.twins(region.name):
+        try:
+            path = link_figure(ASSETS_DIR / name.replace(stem, figure_stem(twin), 1), name)
+        except FileNotFoundError:
+            continue  # not rendered yet (or collected meanwhile)
+        stats["shared"] += 1
+        return path
+
+    # Imported on the first render so PyMuPDF stays out of API startup
+    from app.services.figure_extractor import render_region
+
+    return render_region(region, variant or "full", fmt)
+
+
+async def get_figure(name: str) -> Path:
+    """
+    Path of a rendered figure variant, rendering it first if nobody has asked for it yet.
+    """
+    if not FIGURE_NAME.fullmatch(name):
+        raise FigureNotFoundError(name)
+
+    path = ASSETS_DIR / name
+    if path.exists():
+        stats["hits"] += 1
+        return path
+
+    task = _renders.get(name)
+    if task is None:
+        stats["renders"] += 1
+        task = asyncio.create_task(asyncio.to_thread(_render, name))
+        _renders[name] = task
+        task.add_done_callback(lambda _: _renders.pop(name, None))
+    else:
+        stats["coalesced"] += 1
+
+    # A client disconnecting must not cancel the render others are waiting on
+    return await asyncio.shield(task)
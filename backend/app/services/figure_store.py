@@ -0,0 +1,358 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Optional
+
+from app.models import Question
+
+if TYPE_CHECKING:
+    import fitz  # PyMuPDF
+
+ASSETS_DIR = Path("backend/assets/figures")
+ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Question papers are kept here (named by content digest) so figures can be
+# rendered on first request instead of at upload time
+PAPERS_DIR = Path(os.getenv("PAPERS_DIR", str(Path(__file__).parent.parent.parent / "uploads" / "papers")))
+PAPERS_DIR.mkdir(parents=True, exist_ok=True)
+
+FIGURES_URL_PREFIX = "/api/figures/"
+
+WEBP_QUALITY = int(os.getenv("FIGURE_WEBP_QUALITY", "80"))
+
+FIGURE_DB_PATH = Path(os.getenv("FIGURE_DB_PATH", "data/figures.db"))
+FIGURE_GC_INTERVAL_SECONDS = int(os.getenv("FIGURE_GC_INTERVAL_SECONDS", "600"))
+
+# Unreferenced figures younger than this survive GC (a parse job may still
+# be about to create the session that references them)
+FIGURE_GC_GRACE_SECONDS = int(os.getenv("FIGURE_GC_GRACE_SECONDS", "3600"))
+
+# Sessions of the memory store (SESSION_STORE, see session_store) live and die
+# with their worker process, so that process owns their figure references and
+# only its own GC may judge them; with the shared SQLite store nobody owns them
+FIGURE_REF_OWNER = uuid.uuid4().hex if os.getenv("SESSION_STORE", "memory") == "memory" else ""
+
+# References of an owner not heard from for this long died with its process
+REF_OWNER_TIMEOUT_SECONDS = 3 * FIGURE_GC_INTERVAL_SECONDS
+
+
+@dataclass(frozen=True)
+class FigureRegion:
+    """Where a not-yet-rendered figure lives: a clip of one page of a paper."""
+    name: str
+    paper: str  # path of the retained question paper
+    page: int  # 0-based page index
+    clip: tuple[float, float, float, float]
+
+
+def pixmap_digest(pix: "fitz.Pixmap") -> str:
+    """Hash of a render's size and pixels: equal digests mean identical images."""
+    digest = hashlib.sha256(f"{pix.width}x{pix.height}x{pix.n}:".encode())
+    digest.update(pix.samples_mv)
+    return digest.hexdigest()[:32]
+
+
+def _encode(pix: "fitz.Pixmap", path: Path, fmt: str) -> None:
+    if fmt == "webp":
+        # Imported here: the API process only needs PIL once it renders a figure
+        from PIL import Image
+
+        # Wrap the pixmap's buffer instead of copying it (Image.frombytes)
+        mode = "L" if pix.n == 1 else "RGB"
+        img = Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, pix.stride, 1)
+        img.save(path, "WEBP", quality=WEBP_QUALITY, method=4)
+    else:
+        pix.save(path, output="png")
+
+
+def save_pixmap(pix: "fitz.Pixmap", name: str) -> Path:
+    """Write a figure file; the format (png or webp) follows the name's extension."""
+    out = ASSETS_DIR / name
+
+    if out.exists():
+        # Refresh mtime so GC's grace period covers the session about to use it
+        os.utime(out)
+    else:
+        # Write-then-rename so concurrent writers never expose a partial file
+        tmp = out.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        _encode(pix, tmp, out.suffix.lstrip("."))
+        os.replace(tmp, out)
+
+    return out
+
+
+def link_figure(source: Path, name: str) -> Path:
+    """Serve an already rendered file under another figure name (hard link, or a copy)."""
+    out = ASSETS_DIR / name
+    tmp = out.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copyfile(source, tmp)
+    os.replace(tmp, out)
+    return out
+
+
+def figure_stem(name: str) -> str:
+    """The "fig_<hash>" part shared by every variant file (fig_<hash>[.<size>].<fmt>)."""
+    return name.split(".", 1)[0]
+
+
+def figure_names(urls: Iterable[str]) -> set[str]:
+    return {url[len(FIGURES_URL_PREFIX):] for url in urls if url.startswith(FIGURES_URL_PREFIX)}
+
+
+def question_figure_names(questions: list[Question]) -> set[str]:
+    return figure_names(url for q in questions for url in (q.images or []))
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS figure_refs (
+            session_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            owner TEXT NOT NULL DEFAULT '',  -- FIGURE_REF_OWNER of the process holding the session
+            PRIMARY KEY (session_id, name)
+        )
+        """
+    )
+    if "owner" not in {r[1] for r in conn.execute("PRAGMA table_info(figure_refs)")}:
+        conn.execute("ALTER TABLE figure_refs ADD COLUMN owner TEXT NOT NULL DEFAULT ''")
+    conn.execute("CREATE INDEX IF NOT EXISTS figure_refs_name ON figure_refs (name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS figure_refs_owner ON figure_refs (owner)")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS figure_ref_owners (
+            owner TEXT PRIMARY KEY,
+            seen_at REAL NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS figure_regions (
+            name TEXT PRIMARY KEY,
+            paper TEXT NOT NULL,
+            page INTEGER NOT NULL,
+            x0 REAL NOT NULL, y0 REAL NOT NULL, x1 REAL NOT NULL, y1 REAL NOT NULL,
+            created_at REAL NOT NULL,
+            pixels TEXT  -- pixmap_digest of the full render, once verified against a duplicate
+        )
+        """
+    )
+    if "pixels" not in {r[1] for r in conn.execute("PRAGMA table_info(figure_regions)")}:
+        conn.execute("ALTER TABLE figure_regions ADD COLUMN pixels TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS figure_regions_pixels ON figure_regions (pixels)")
+    return conn
+
+
+class FigureRefs:
+    """
+    Which sessions use which figure files.
+
+    Each (session, figure) row is one reference; a figure's reference count
+    is its number of rows. Shared by all worker processes via SQLite (WAL).
+
+    With an ``owner`` (per-process sessions), each process lists and releases
+    only its own sessions' references and keeps a heartbeat; references of
+    owners whose heartbeat stopped are released by any process.
+    """
+
+    def __init__(self, path: Path = FIGURE_DB_PATH, owner: str = FIGURE_REF_OWNER):
+        self.path = path
+        self.owner = owner
+        self._lock = threading.Lock()
+        self._conn = None  # opened on first use; parse workers never need it
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = _connect(self.path)
+        return self._conn
+
+    def add(self, session_id: str, names: Iterable[str]) -> None:
+        with self._lock:
+            db = self._db()
+            db.executemany(
+                "INSERT OR IGNORE INTO figure_refs (session_id, name, owner) VALUES (?, ?, ?)",
+                [(session_id, name, self.owner) for name in names],
+            )
+            if self.owner:
+                self._heartbeat(db)
+
+    def _heartbeat(self, db: sqlite3.Connection) -> None:
+        db.execute(
+            "INSERT OR REPLACE INTO figure_ref_owners (owner, seen_at) VALUES (?, ?)", (self.owner, time.time())
+        )
+
+    def release_orphans(self) -> int:
+        """Refresh this process's heartbeat and drop references of owners that stopped; returns how many."""
+        if not self.owner:
+            return 0
+        cutoff = time.time() - REF_OWNER_TIMEOUT_SECONDS
+        with self._lock:
+            db = self._db()
+            self._heartbeat(db)
+            db.execute("DELETE FROM figure_ref_owners WHERE seen_at < ?", (cutoff,))
+            # Rows without an owner predate owners; their memory sessions are gone
+            return db.execute(
+                "DELETE FROM figure_refs WHERE owner NOT IN (SELECT owner FROM figure_ref_owners)"
+            ).rowcount
+
+    def release(self, session_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._db().executemany(
+                "DELETE FROM figure_refs WHERE session_id = ?",
+                [(session_id,) for session_id in session_ids],
+            )
+
+    def session_ids(self) -> list[str]:
+        """Sessions whose liveness this process can judge (its own, or all without an owner)."""
+        with self._lock:
+            return [r[0] for r in self._db().execute(
+                "SELECT DISTINCT session_id FROM figure_refs WHERE owner = ?", (self.owner,)
+            )]
+
+    def referenced(self) -> set[str]:
+        with self._lock:
+            return {r[0] for r in self._db().execute("SELECT DISTINCT name FROM figure_refs")}
+
+    def refcount(self, name: str) -> int:
+        with self._lock:
+            return self._db().execute(
+                "SELECT COUNT(*) FROM figure_refs WHERE name = ?", (name,)
+            ).fetchone()[0]
+
+
+class FigureRegions:
+    """
+    Figures located at parse time but only rendered when first requested.
+
+    Written by the parse workers, read by the render route.
+    """
+
+    def __init__(self, path: Path = FIGURE_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = _connect(self.path)
+        return self._conn
+
+    def add(self, regions: Iterable[FigureRegion]) -> None:
+        now = time.time()
+        with self._lock:
+            self._db().executemany(
+                "INSERT OR REPLACE INTO figure_regions (name, paper, page, x0, y0, x1, y1, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(r.name, r.paper, r.page, *r.clip, now) for r in regions],
+            )
+
+    def get(self, name: str) -> Optional[FigureRegion]:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT name, paper, page, x0, y0, x1, y1 FROM figure_regions WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None:
+            return None
+        return FigureRegion(name=row[0], paper=row[1], page=row[2], clip=tuple(row[3:]))
+
+    def set_pixels(self, digests: dict[str, str]) -> None:
+        """Record the pixel digest of rendered regions, by name."""
+        with self._lock:
+            self._db().executemany(
+                "UPDATE figure_regions SET pixels = ? WHERE name = ?",
+                [(digest, name) for name, digest in digests.items()],
+            )
+
+    def twins(self, name: str) -> list[str]:
+        """Other regions whose full render is pixel-identical to this one's."""
+        with self._lock:
+            return [r[0] for r in self._db().execute(
+                "SELECT t.name FROM figure_regions f JOIN figure_regions t ON t.pixels = f.pixels "
+                "WHERE f.name = ? AND t.name != f.name",
+                (name,),
+            )]
+
+    def available(self, names: Iterable[str]) -> bool:
+        """Whether every named figure can still be served (rendered or renderable)."""
+        with self._lock:
+            for name in names:
+                if (ASSETS_DIR / name).exists():
+                    continue
+                row = self._db().execute(
+                    "SELECT paper FROM figure_regions WHERE name = ?", (name,)
+                ).fetchone()
+                if row is None or not Path(row[0]).exists():
+                    return False
+        return True
+
+    def prune(self, keep: set[str], cutoff: float) -> set[str]:
+        """Forget regions not in ``keep`` created before ``cutoff``; returns the papers still needed."""
+        with self._lock:
+            db = self._db()
+            stale = [
+                (name,) for name, created in db.execute("SELECT name, created_at FROM figure_regions")
+                if name not in keep and created < cutoff
+            ]
+            db.executemany("DELETE FROM figure_regions WHERE name = ?", stale)
+            return {r[0] for r in db.execute("SELECT DISTINCT paper FROM figure_regions")}
+
+
+figure_refs = FigureRefs()
+figure_regions = FigureRegions()
+
+
+def figures_available(urls: Iterable[str]) -> bool:
+    return figure_regions.available(figure_names(urls))
+
+
+def collect_garbage(
+    is_live: Callable[[str], bool],
+    keep: set[str] = frozenset(),
+    grace: int = FIGURE_GC_GRACE_SECONDS,
+) -> int:
+    """
+    Delete figures (all size/format variants) no live session references;
+    returns how many files were removed.
+
+    ``is_live(session_id)`` decides whether a referencing session still
+    exists (for the sessions this process owns; see FigureRefs); references
+    of dead sessions and of stopped processes are dropped first. Names in
+    ``keep`` (e.g. figures held by the ingest cache) are never deleted.
+    Retained papers no remaining figure points at are removed as well.
+    """
+    figure_refs.release_orphans()
+    figure_refs.release([sid for sid in figure_refs.session_ids() if not is_live(sid)])
+    referenced = figure_refs.referenced() | set(keep)
+
+    cutoff = time.time() - grace
+    papers = figure_regions.prune(referenced, cutoff)
+
+    removed = 0
+    stems = {figure_stem(name) for name in referenced}
+    candidates = [
+        p for p in ASSETS_DIR.glob("fig_*")
+        if p.suffix in (".png", ".webp") and figure_stem(p.name) not in stems
+    ]
+    candidates += [p for p in PAPERS_DIR.glob("*.pdf") if str(p) not in papers]
+    for path in candidates:
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
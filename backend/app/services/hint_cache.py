@@ -0,0 +1,171 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+HINT_CACHE_PATH = Path(os.getenv("HINT_CACHE_PATH", "data/hints.db"))
+HINT_CACHE_TTL_SECONDS = int(os.getenv("HINT_CACHE_TTL_SECONDS", str(90 * 24 * 3600)))
+HINT_CACHE_MAX_ENTRIES = int(os.getenv("HINT_CACHE_MAX_ENTRIES", "100000"))
+
+# Last-access is refreshed at most this often per hint to keep hits write-free
+TOUCH_INTERVAL_SECONDS = 3600
+
+# Expired and surplus hints are removed at most this often (on a put), not on every insert
+EVICT_INTERVAL_SECONDS = 60
+
+
+def hint_key(model: str, prompt: str, answer: str = "") -> str:
+    """
+    Content key: the same prompt (question type, text and options) with the
+    same correct answer under the same model shares one hint.
+    """
+    return hashlib.sha256(f"{model}\0{prompt}\0{answer}".encode()).hexdigest()
+
+
+class HintCache:
+    """
+    Persistent hint cache shared across sessions, restarts and worker processes.
+
+    Hints are keyed by the hash of the rendered prompt and model name, expire
+    ``ttl`` seconds after their last use, and the least recently used entries
+    are evicted beyond ``max_entries`` (checked every EVICT_INTERVAL_SECONDS).
+    A key can be aliased to another (a near-duplicate question to its
+    canonical copy): it is then served, and generated, under the other key
+    unless it has a hint of its own.
+    Every method blocks on SQLite: call them off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: Path = HINT_CACHE_PATH,
+        ttl: int = HINT_CACHE_TTL_SECONDS,
+        max_entries: int = HINT_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._evicted_at = 0.0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS hints (
+                key TEXT PRIMARY KEY,
+                hint TEXT NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS hints_accessed ON hints (accessed_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hint_aliases (key TEXT PRIMARY KEY, target TEXT NOT NULL)"
+        )
+
+    def alias(self, pairs: Iterable[tuple[str, str]]) -> int:
+        """Serve each (key, target) pair's key with the target's hint; returns how many were added."""
+        pairs = [(key, target) for key, target in pairs if key != target]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO hint_aliases (key, target) VALUES (?, ?)", pairs
+            )
+        return len(pairs)
+
+    def resolve(self, key: str) -> str:
+        """The key a missing hint for ``key`` is generated under."""
+        with self._lock:
+            row = self._conn.execute("SELECT target FROM hint_aliases WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else key
+
+    def _lookup(self, keys: list[str]) -> dict[str, tuple[str, str, float]]:
+        """key -> (key the hint is stored under, hint, accessed_at); own hints before aliased ones."""
+        found = {}
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            marks = ", ".join("?" * len(chunk))
+            for key, stored, hint, accessed_at in self._conn.execute(
+                f"SELECT key, key, hint, accessed_at FROM hints WHERE key IN ({marks}) "
+                f"UNION ALL SELECT a.key, h.key, h.hint, h.accessed_at FROM hint_aliases a "
+                f"JOIN hints h ON h.key = a.target WHERE a.key IN ({marks})",
+                chunk + chunk,
+            ):
+                if key not in found or found[key][0] != key:
+                    found[key] = (stored, hint, accessed_at)
+        return found
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._lookup([key]).get(key)
+            if row is None or row[2] < now - self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM hints WHERE key = ?", (row[0],))
+                    self.evictions += 1
+                self.misses += 1
+                return None
+
+            if now - row[2] > TOUCH_INTERVAL_SECONDS:
+                self._conn.execute("UPDATE hints SET accessed_at = ? WHERE key = ?", (now, row[0]))
+            self.hits += 1
+            return row[1]
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, str]:
+        """Live hints among ``keys``, by key, in one query per 500 keys (counted like get)."""
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            found = {key: row for key, row in self._lookup(keys).items() if row[2] >= now - self.ttl}
+
+            touched = {(now, stored) for stored, _, seen in found.values() if now - seen > TOUCH_INTERVAL_SECONDS}
+            if touched:
+                self._conn.executemany("UPDATE hints SET accessed_at = ? WHERE key = ?", touched)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return {key: hint for key, (_, hint, _) in found.items()}
+
+    def put(self, key: str, hint: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hints (key, hint, accessed_at) VALUES (?, ?, ?)",
+                (key, hint, now),
+            )
+            if now - self._evicted_at >= EVICT_INTERVAL_SECONDS:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self._evicted_at = now
+        removed = self._conn.execute(
+            "DELETE FROM hints WHERE accessed_at < ?", (now - self.ttl,)
+        ).rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM hints").fetchone()[0]
+        if count > self.max_entries:
+            removed += self._conn.execute(
+                "DELETE FROM hints WHERE key IN "
+                "(SELECT key FROM hints ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            ).rowcount
+        self.evictions += removed
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM hints").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+hint_cache = HintCache()
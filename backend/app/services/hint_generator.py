@@ -1,22 +1,40 @@
+import asyncio
+import json
 import os
+import random
 from typing import Optional
 
-from google import genai
 from app.models import Question, QuestionType
+from app.services.hint_cache import hint_cache, hint_key
+from app.services.hint_provider import HintProvider, create_hint_provider
+from app.services.metrics import stage_timer
 
 # =========================
-# GEMINI API KEY FROM ENV
+# PROVIDER + CALL LIMITS
 # =========================
-API_KEY = os.getenv("GEMINI_API_KEY")
+# Created on first use (see get_provider)
+_provider: Optional[HintProvider] = None
 
-if not API_KEY:
-    raise ValueError("GEMINI_API_KEY environment variable is not set")
+# Max outbound LLM calls in flight at once (per process)
+HINT_CONCURRENCY = int(os.getenv("HINT_CONCURRENCY", "8"))
+# Deadline for one hint, covering every attempt and the backoff between them
+HINT_TIMEOUT_SECONDS = float(os.getenv("HINT_TIMEOUT_SECONDS", "20"))
+# Retries of transient failures only (see HintProvider.is_transient)
+HINT_RETRIES = int(os.getenv("HINT_RETRIES", "2"))
+HINT_BACKOFF_SECONDS = 0.5
 
-# Create Gemini client
-client = genai.Client(api_key=API_KEY)
+# Generate hints for every question right after a session is created
+HINT_PREFETCH = os.getenv("HINT_PREFETCH", "0") == "1"
+# Prefetch calls per session; leaves semaphore slots for live hint requests
+HINT_PREFETCH_CONCURRENCY = int(os.getenv("HINT_PREFETCH_CONCURRENCY", "4"))
 
-# In-memory cache: {session_id: {question_number: hint_text}}
-_hint_cache: dict[str, dict[int, str]] = {}
+_call_slots = asyncio.Semaphore(HINT_CONCURRENCY)
+
+# Single-flight: one provider request per hint key, shared by concurrent callers
+_inflight: dict[str, asyncio.Task] = {}
+
+# Running prefetches (kept referenced so they aren't garbage collected)
+_prefetch_tasks: set[asyncio.Task] = set()
 
 
 # =========================
@@ -54,12 +72,12 @@ Output ONLY the hint text. Nothing else.
 """
 
 
-def get_cached_hint(session_id: str, question_number: int) -> Optional[str]:
-    return _hint_cache.get(session_id, {}).get(question_number)
-
-
-def cache_hint(session_id: str, question_number: int, hint: str) -> None:
-    _hint_cache.setdefault(session_id, {})[question_number] = hint
+def get_provider() -> HintProvider:
+    """The configured hint provider; an unavailable stand-in if hints aren't configured."""
+    global _provider
+    if _provider is None:
+        _provider = create_hint_provider()
+    return _provider
 
 
 def format_question_type(q_type: QuestionType) -> str:
@@ -80,36 +98,54 @@ def format_options(options: Optional[dict[str, str]]) -> str:
     return "\n".join(lines)
 
 
-async def generate_hint(
-    question: Question,
-    session_id: str,
-) -> tuple[str, bool]:
-    """
-    Generate a short, high-quality hint using Gemini 3 Flash Preview.
+async def _generate(provider: HintProvider, prompt: str) -> str:
+    async with _call_slots:
+        return await provider.generate(prompt)
 
-    Returns:
-        (hint_text, is_cached)
+
+async def _call_provider(prompt: str) -> str:
+    """
+    Provider call bounded by the global semaphore. Transient failures are
+    retried; the whole call, retries included, must finish within
+    HINT_TIMEOUT_SECONDS (asyncio.TimeoutError otherwise).
     """
+    provider = get_provider()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + HINT_TIMEOUT_SECONDS
+
+    for attempt in range(HINT_RETRIES + 1):
+        try:
+            return await asyncio.wait_for(_generate(provider, prompt), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            # Exponential backoff with jitter so a burst of failures doesn't retry in lockstep
+            backoff = HINT_BACKOFF_SECONDS * 2 ** attempt * (1 + random.random())
+            if attempt == HINT_RETRIES or not provider.is_transient(e) or loop.time() + backoff >= deadline:
+                raise
+        await asyncio.sleep(backoff)
 
-    # Cache check
-    cached = get_cached_hint(session_id, question.number)
-    if cached:
-        return cached, True
 
-    # Build prompt
-    prompt = HINT_PROMPT.format(
+def build_hint_prompt(question: Question) -> str:
+    return HINT_PROMPT.format(
         question_type=format_question_type(question.question_type),
         question_text=question.text,
         options_text=format_options(question.options),
     )
 
-    # Gemini call (sync SDK, safe inside FastAPI async route)
-    response = client.models.generate_content(
-        model="gemini-3-flash-preview",
-        contents=prompt,
-    )
 
-    hint_text = response.text.strip()
+def question_hint_key(model: str, question: Question, prompt: str) -> str:
+    """
+    Cache key of a question's hint: copies of a question in other papers
+    share it if their text, options, type and answer are identical (and
+    near-duplicates through share_hints).
+    """
+    return hint_key(model, prompt, json.dumps(question.correct_answer))
+
+
+async def _fetch_hint(key: str, prompt: str) -> str:
+    with stage_timer("hint.llm"):
+        hint_text = (await _call_provider(prompt)).strip()
 
     # =========================
     # HARD SAFETY WORD CAP
@@ -118,11 +154,106 @@ async def generate_hint(
     if len(words) > 35:
         hint_text = " ".join(words[:35])
 
-    # Cache and return
-    cache_hint(session_id, question.number, hint_text)
-    return hint_text, False
+    # The cache is SQLite: read and written off the event loop
+    await asyncio.to_thread(hint_cache.put, key, hint_text)
+    return hint_text
+
+
+async def generate_hint(question: Question) -> tuple[str, bool]:
+    """
+    Generate a short, high-quality hint using the configured provider.
+
+    Hints are cached by prompt content, so the same question uploaded in
+    any session reuses them. Concurrent requests for the same hint wait on
+    a single provider call.
+
+    Returns:
+        (hint_text, is_cached)
+
+    Raises HintsUnavailableError on a cache miss when no provider is configured.
+    """
+    prompt = build_hint_prompt(question)
+    key = question_hint_key(get_provider().model, question, prompt)
+
+    # Cache check
+    with stage_timer("hint.cache"):
+        cached = await asyncio.to_thread(hint_cache.get, key)
+    if cached:
+        return cached, True
+
+    # A near-duplicate shares its canonical copy's hint (see share_hints)
+    key = await asyncio.to_thread(hint_cache.resolve, key)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_hint(key, prompt))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    # shield: a caller disconnecting must not cancel the shared request
+    return await asyncio.shield(task), False
+
+
+def _same_choices(a: Question, b: Question) -> bool:
+    def normalized(q: Question) -> dict[str, str]:
+        return {k: " ".join(v.split()) for k, v in (q.options or {}).items()}
+
+    return (
+        a.question_type == b.question_type
+        and json.dumps(a.correct_answer) == json.dumps(b.correct_answer)
+        and normalized(a) == normalized(b)
+    )
+
+
+def share_hints(pairs: list[tuple[Question, Question]]) -> int:
+    """
+    Let near-duplicates use their canonical copy's hint: for each
+    (question, canonical copy) pair with the same type, answer and options
+    (up to whitespace), the question's hint key is aliased to the copy's.
+    A hint the question already has is kept. Blocking; returns the number
+    of questions aliased.
+    """
+    model = get_provider().model
+    return hint_cache.alias(
+        (question_hint_key(model, q, build_hint_prompt(q)), question_hint_key(model, c, build_hint_prompt(c)))
+        for q, c in pairs
+        if _same_choices(q, c)
+    )
+
+
+def get_cached_hints(questions: list[Question]) -> dict[int, str]:
+    """Hints already available for the given questions, by question number (one cache query; blocking)."""
+    model = get_provider().model
+    keys = {q.number: question_hint_key(model, q, build_hint_prompt(q)) for q in questions}
+    found = hint_cache.get_many(keys.values())
+    return {number: found[key] for number, key in keys.items() if key in found}
+
+
+async def prefetch_hints(questions: list[Question]) -> int:
+    """
+    Warm the hint cache for a whole session.
+
+    Runs at most HINT_PREFETCH_CONCURRENCY generations at a time (still
+    subject to the global call limit); questions that fail are left for
+    on-demand generation. Returns the number of hints now available.
+    """
+    slots = asyncio.Semaphore(HINT_PREFETCH_CONCURRENCY)
+
+    async def one(question: Question) -> None:
+        async with slots:
+            await generate_hint(question)
+
+    results = await asyncio.gather(*(one(q) for q in questions), return_exceptions=True)
+    return sum(1 for r in results if not isinstance(r, BaseException))
+
+
+def schedule_prefetch(questions: list[Question], loop: asyncio.AbstractEventLoop) -> None:
+    """Start prefetch_hints() on ``loop`` if HINT_PREFETCH is on; safe from any thread."""
+    if not HINT_PREFETCH or not get_provider().available:
+        return
 
+    def start() -> None:
+        task = loop.create_task(prefetch_hints(questions))
+        _prefetch_tasks.add(task)
+        task.add_done_callback(_prefetch_tasks.discard)
 
-def clear_session_cache(session_id: str) -> None:
-    if session_id in _hint_cache:
-        del _hint_cache[session_id]
+    loop.call_soon_threadsafe(start)
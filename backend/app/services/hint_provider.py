@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import logging
+import os
+from abc import ABC, abstractmethod
+
+# "gemini" (default) or "fake" for offline development and tests
+HINT_PROVIDER = os.getenv("HINT_PROVIDER", "gemini")
+HINT_MODEL = os.getenv("HINT_MODEL", "gemini-3-flash-preview")
+
+logger = logging.getLogger(__name__)
+
+
+class HintsUnavailableError(Exception):
+    """Raised when a new hint is needed but no hint provider is configured."""
+
+
+class HintProvider(ABC):
+    """An LLM backend that turns a rendered hint prompt into hint text."""
+
+    model: str
+    available = True
+
+    @abstractmethod
+    async def generate(self, prompt: str) -> str:
+        ...
+
+    def is_transient(self, exc: Exception) -> bool:
+        """Whether a failed generate() may succeed on retry (dropped connection, rate limit, server error)."""
+        return isinstance(exc, ConnectionError)
+
+
+class GeminiHintProvider(HintProvider):
+    def __init__(self, api_key: str, model: str = HINT_MODEL):
+        self.model = model
+        self._api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        # google.genai takes about half a second to import: pay it on the first hint, not at startup
+        if self._client is None:
+            from google import genai
+
+            self._client = genai.Client(api_key=self._api_key)
+        return self._client
+
+    async def generate(self, prompt: str) -> str:
+        # Async SDK surface: the event loop keeps serving while Gemini thinks
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
+            contents=prompt,
+        )
+        return response.text
+
+    def is_transient(self, exc: Exception) -> bool:
+        # Only reached after a call, so google.genai is already loaded
+        import httpx
+        from google.genai import errors
+
+        if isinstance(exc, errors.APIError):
+            # 429 rate limited, 5xx server side; other 4xx (bad key, bad request) won't change
+            return exc.code == 429 or exc.code >= 500
+        return isinstance(exc, (httpx.TransportError, ConnectionError))
+
+
+class FakeHintProvider(HintProvider):
+    """
+    Deterministic offline provider.
+
+    Returns a canned hint derived from the prompt after ``delay`` seconds
+    and counts calls, so coalescing and caching can be checked without
+    network access.
+    """
+
+    def __init__(self, delay: float = float(os.getenv("FAKE_HINT_DELAY", "0.05"))):
+        self.model = "fake"
+        self.delay = delay
+        self.calls = 0
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        tag = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+        return f"Recall the core definition involved and apply it step by step. [{tag}]"
+
+
+class UnavailableHintProvider(HintProvider):
+    """
+    Stands in when hints aren't configured, so quizzes still work.
+
+    Keeps the configured model name: hints cached by an earlier,
+    configured run are still served; new ones raise HintsUnavailableError.
+    """
+    available = False
+
+    def __init__(self, reason: str, model: str = HINT_MODEL):
+        self.model = model
+        self.reason = reason
+
+    async def generate(self, prompt: str) -> str:
+        raise HintsUnavailableError(self.reason)
+
+
+def create_hint_provider(kind: str = HINT_PROVIDER) -> HintProvider:
+    if kind == "fake":
+        return FakeHintProvider()
+    if kind == "gemini":
+        api_key = os.getenv("GEMINI_API_KEY")
+        if api_key:
+            return GeminiHintProvider(api_key)
+        reason = "GEMINI_API_KEY environment variable is not set"
+    else:
+        reason = f"Unknown HINT_PROVIDER: {kind}"
+
+    logger.warning("Hints disabled: %s", reason)
+    return UnavailableHintProvider(reason)
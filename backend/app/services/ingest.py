@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from app.models import Question, ParsedAnswerKey
+from app.services.answer_key_parser import extract_answer_key_from_table
+from app.services.metrics import stage_timer
+from app.services.pdf_document import PageContent, PdfDocument, iter_document_pages, process_document
+from app.services.question_extractor import iter_questions, parse_questions, settle_streamed_questions
+
+# progress(stage, pages_done, pages_total)
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class IngestError(Exception):
+    """Raised when an uploaded paper or answer key cannot be parsed."""
+
+
+@dataclass
+class IngestResult:
+    questions: list[Question]
+    answer_key: dict[int, ParsedAnswerKey]
+    figures: dict[int, list[str]]
+
+
+def ingest_papers(
+    questions_path: Path,
+    answer_key_path: Path,
+    progress: Optional[ProgressCallback] = None,
+    emit: Optional[Callable[[Question], None]] = None,
+) -> IngestResult:
+    """
+    Parse an answer key and question paper into quiz questions.
+
+    This is the CPU-heavy part of an upload and is meant to run off the
+    event loop (see app.services.jobs). With ``emit``, each question is
+    also handed out as soon as it is parsed, before the paper is finished.
+    """
+    def stage(name: str) -> Optional[Callable[[int, int], None]]:
+        if not progress:
+            return None
+        return lambda done, total: progress(name, done, total)
+
+    answer_key = extract_answer_key_from_table(
+        answer_key_path, on_page=stage("answer_key"), on_table_page=stage("answer_key_tables"),
+    )
+    if not answer_key:
+        raise IngestError("Answer key parsing failed")
+
+    # One pass over the paper: text and figures together
+    if emit is None:
+        document = process_document(questions_path, on_page=stage("questions"))
+        questions = parse_questions(document, answer_key)
+    else:
+        pages: list[PageContent] = []
+        streamed: dict[int, Question] = {}
+
+        def read_pages() -> Iterator[PageContent]:
+            for page in iter_document_pages(questions_path, on_page=stage("questions")):
+                pages.append(page)
+                yield page
+
+        with stage_timer("questions.stream"):
+            for question in iter_questions(read_pages(), answer_key):
+                emit(question)
+                streamed[question.number] = question
+        document = PdfDocument(pages=pages)
+
+        # Uploads store exactly what the batch parser would; a streamed
+        # question that came out differently is sent again (see stream_quiz)
+        questions = settle_streamed_questions(document, answer_key, streamed)
+
+    if not questions:
+        raise IngestError("Question parsing failed")
+
+    return IngestResult(
+        questions=questions,
+        answer_key=answer_key,
+        figures=document.figures,
+    )
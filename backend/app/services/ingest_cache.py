@@ -0,0 +1,126 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from app.models import ParsedAnswerKey
+from app.services.question_set import QuestionSet
+
+# Total budget for cached parse results (estimated serialized size)
+INGEST_CACHE_MAX_BYTES = int(os.getenv("INGEST_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+@dataclass(frozen=True)
+class IngestEntry:
+    """Everything parsed out of one (question paper, answer key) pair."""
+    questions: QuestionSet
+    answer_key: dict[int, ParsedAnswerKey]
+    figures: dict[int, list[str]]
+    size: int
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def ingest_key(questions_digest: str, answer_key_digest: str) -> str:
+    """Cache key for a paper + key pair, built from the digests of the uploaded bytes."""
+    return f"{questions_digest}:{answer_key_digest}"
+
+
+def _estimate_size(
+    questions: QuestionSet,
+    answer_key: dict[int, ParsedAnswerKey],
+    figures: dict[int, list[str]],
+) -> int:
+    # The question set is shared with live sessions of the same paper
+    size = questions.size
+    size += sum(len(a.model_dump_json()) for a in answer_key.values())
+    size += sum(len(url) for urls in figures.values() for url in urls)
+    return size
+
+
+class IngestCache:
+    """
+    LRU cache of parsed uploads keyed by the hash of the uploaded bytes.
+
+    Entries are evicted least-recently-used first once the estimated size
+    of all entries exceeds ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = INGEST_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, IngestEntry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[IngestEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(
+        self,
+        key: str,
+        questions: QuestionSet,
+        answer_key: dict[int, ParsedAnswerKey],
+        figures: dict[int, list[str]],
+    ) -> IngestEntry:
+        entry = IngestEntry(
+            questions=questions,
+            answer_key=dict(answer_key),
+            figures=dict(figures),
+            size=_estimate_size(questions, answer_key, figures),
+        )
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+
+            # An entry larger than the whole budget is never cached
+            if entry.size > self.max_bytes:
+                return entry
+
+            self._entries[key] = entry
+            self._bytes += entry.size
+
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+        return entry
+
+    def figure_urls(self) -> set[str]:
+        """Every figure URL held by a cached entry (kept alive by figure GC)."""
+        with self._lock:
+            return {url for e in self._entries.values() for urls in e.figures.values() for url in urls}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+ingest_cache = IngestCache()
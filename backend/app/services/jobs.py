@@ -0,0 +1,208 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from app.models import JobStatus, JobResponse
+from app.services.metrics import collect_stages, replay_stages
+
+# Number of processes parsing uploads in parallel
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# Finished jobs are kept this long so clients can still poll them
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+
+@dataclass
+class Job:
+    id: str
+    status: JobStatus = JobStatus.QUEUED
+    stage: Optional[str] = None
+    pages_done: int = 0
+    pages_total: int = 0
+    session_id: Optional[str] = None
+    total_questions: Optional[int] = None
+    error: Optional[str] = None
+    updated_at: float = field(default_factory=time.monotonic)
+    version: int = 0
+    # Results the worker emitted before finishing (e.g. questions parsed so far)
+    partial: list[Any] = field(default_factory=list)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.FAILED)
+
+    def to_response(self) -> JobResponse:
+        return JobResponse(
+            job_id=self.id,
+            status=self.status,
+            stage=self.stage,
+            pages_done=self.pages_done,
+            pages_total=self.pages_total,
+            session_id=self.session_id,
+            total_questions=self.total_questions,
+            error=self.error,
+        )
+
+
+# =========================
+# WORKER PROCESS SIDE
+# =========================
+_worker_queue = None
+_worker_job_id: Optional[str] = None
+
+
+def _init_worker(queue) -> None:
+    global _worker_queue
+    _worker_queue = queue
+
+
+def _report_progress(stage: str, done: int, total: int) -> None:
+    if _worker_queue is not None:
+        _worker_queue.put(("progress", _worker_job_id, (stage, done, total)))
+
+
+def _emit(item: Any) -> None:
+    if _worker_queue is not None:
+        _worker_queue.put(("partial", _worker_job_id, item))
+
+
+def _run_job(job_id: str, fn: Callable[..., Any], args: tuple) -> Any:
+    global _worker_job_id
+    _worker_job_id = job_id
+    _report_progress("started", 0, 0)
+    # Stage timings recorded here would die with the worker; send them back
+    with collect_stages() as stages:
+        return fn(*args, progress=_report_progress, emit=_emit), stages
+
+
+# =========================
+# API PROCESS SIDE
+# =========================
+class JobManager:
+    """
+    Runs parse jobs on a process pool so the event loop never does PDF work.
+
+    Workers report per-page progress through a multiprocessing queue that a
+    daemon thread drains into the in-memory job table.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue = None
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                ctx = multiprocessing.get_context("spawn")
+                self._queue = ctx.Queue()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=ctx,
+                    initializer=_init_worker,
+                    initargs=(self._queue,),
+                )
+                threading.Thread(target=self._drain_progress, daemon=True).start()
+            return self._pool
+
+    def _drain_progress(self) -> None:
+        queue = self._queue
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            kind, job_id, payload = item
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job.finished:
+                    continue
+                job.status = JobStatus.RUNNING
+                if kind == "partial":
+                    # Not a status change: SSE progress clients needn't wake up
+                    job.partial.append(payload)
+                    continue
+                stage, done, total = payload
+                if stage != "started":
+                    job.stage, job.pages_done, job.pages_total = stage, done, total
+                self._touch(job)
+
+    def _touch(self, job: Job) -> None:
+        job.updated_at = time.monotonic()
+        job.version += 1
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - JOB_TTL_SECONDS
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.updated_at < cutoff]:
+            del self._jobs[job_id]
+
+    def create(self) -> Job:
+        job = Job(id=str(uuid.uuid4()))
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def complete(self, job: Job, session_id: str, total_questions: int) -> None:
+        with self._lock:
+            job.status = JobStatus.DONE
+            job.stage = "done"
+            job.session_id = session_id
+            job.total_questions = total_questions
+            job.partial = []
+            self._touch(job)
+
+    def fail(self, job: Job, error: str) -> None:
+        with self._lock:
+            job.status = JobStatus.FAILED
+            job.error = error
+            job.partial = []
+            self._touch(job)
+
+    def submit(
+        self,
+        job: Job,
+        fn: Callable[..., Any],
+        *args: Any,
+        on_result: Callable[[Job, Any], None],
+        on_error: Callable[[Job, BaseException], None],
+    ) -> None:
+        """
+        Run ``fn(*args, progress=..., emit=...)`` in a worker process.
+
+        ``emit(item)`` appends to ``job.partial`` while the job runs; the
+        list is dropped once the job finishes.
+
+        ``on_result``/``on_error`` are called from a pool thread in this
+        process once the worker finishes.
+        """
+        def done(future: Future) -> None:
+            try:
+                result, stages = future.result()
+                replay_stages(stages)
+                on_result(job, result)
+            except BaseException as exc:
+                on_error(job, exc)
+
+        self._ensure_pool().submit(_run_job, job.id, fn, args).add_done_callback(done)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+            queue = self._queue
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+            queue.put(None)
+
+
+job_manager = JobManager()
@@ -0,0 +1,180 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+# Latency buckets (seconds) shared by all histograms
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# (stage, seconds) recorded while serving the current request / running the
+# current ingest job; None outside of one
+_stages: ContextVar[Optional[list[tuple[str, float]]]] = ContextVar("stages", default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets=BUCKETS):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[i] += 1
+            self._sums[labels] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for labels, counts in sorted(self._counts.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {self._sums[labels]}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+stage_seconds = Histogram(
+    "gate_stage_duration_seconds", "Time spent in each pipeline stage", ("stage",)
+)
+http_seconds = Histogram(
+    "gate_http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+
+# name -> stats() of a component; rendered as gauges/counters at scrape time
+_collectors: dict[str, Callable[[], dict]] = {}
+
+# Stats keys that only ever grow
+COUNTER_KEYS = {"hits", "misses", "evictions", "renders", "coalesced", "shared"}
+
+
+def register_stats(name: str, stats: Callable[[], dict]) -> None:
+    _collectors[name] = stats
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time a block as a pipeline stage (histogram + Server-Timing entry)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    stage_seconds.observe(seconds, stage)
+    stages = _stages.get()
+    if stages is not None:
+        stages.append((stage, seconds))
+
+
+def replay_stages(stages: list[tuple[str, float]]) -> None:
+    """Record stages timed in another process (page and job workers)."""
+    for stage, seconds in stages:
+        record_stage(stage, seconds)
+
+
+@contextmanager
+def collect_stages() -> Iterator[list[tuple[str, float]]]:
+    """Collect the stages timed inside the block (e.g. one request or one job)."""
+    stages: list[tuple[str, float]] = []
+    token = _stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _stages.reset(token)
+
+
+def server_timing(stages: list[tuple[str, float]], total: float) -> str:
+    """Server-Timing header value; repeated stages are summed."""
+    merged: dict[str, float] = {}
+    for stage, seconds in stages:
+        merged[stage] = merged.get(stage, 0.0) + seconds
+    parts = [f"{stage.replace('.', '-')};dur={seconds * 1000:.1f}" for stage, seconds in merged.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware: collects the stages a request runs into its
+    ``Server-Timing`` header and observes the request latency per route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = "500"
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                header = server_timing(stages, time.perf_counter() - start)
+                message["headers"] = [*message.get("headers", []), (b"server-timing", header.encode())]
+            await send(message)
+
+        with collect_stages() as stages:
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                # The router stores the matched route in the scope; its
+                # templated path keeps label cardinality bounded
+                route = scope.get("route")
+                http_seconds.observe(
+                    time.perf_counter() - start,
+                    scope["method"],
+                    getattr(route, "path", "unmatched"),
+                    status,
+                )
+
+
+def render() -> str:
+    """Everything in Prometheus text exposition format."""
+    lines = stage_seconds.render() + http_seconds.render()
+
+    for component, stats in sorted(_collectors.items()):
+        try:
+            values = stats()
+        except Exception:
+            continue
+        for key, value in values.items():
+            if not isinstance(value, (int, float)):
+                continue
+            name = f"gate_{component}_{key}"
+            if key in COUNTER_KEYS:
+                name += "_total"
+                lines += [f"# TYPE {name} counter", f"{name} {value}"]
+            else:
+                lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import re
+
+import numpy as np
+
+# Signature length and LSH banding: two questions land in a shared bucket
+# (and are compared) with high probability once their shingle sets are
+# about (1 / LSH_BANDS) ** (1 / LSH_ROWS) ≈ 0.6 similar
+MINHASH_PERMUTATIONS = 120
+LSH_BANDS = 20
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+# Estimated Jaccard similarity from which two questions count as duplicates
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.8"))
+
+# Shingles are runs of this many normalized words
+SHINGLE_WORDS = 3
+
+WORD = re.compile(r"\w+")
+
+# Universal hashing (a*x + b) mod p; h < 2**32 and a < 2**31 keep a*h + b
+# inside uint64. Fixed seed: signatures are persisted and must stay comparable
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(0x6A7E)
+_A = _rng.integers(1, _PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingles(content: str) -> set[bytes]:
+    """Word n-grams of the lower-cased content; punctuation and spacing are ignored."""
+    words = WORD.findall(content.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words).encode()}
+    return {" ".join(words[i:i + SHINGLE_WORDS]).encode() for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def signature(content: str) -> np.ndarray:
+    """MinHash signature (MINHASH_PERMUTATIONS uint32 values) of the content's shingles."""
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s, digest_size=4).digest(), "little") for s in shingles(content)),
+        dtype=np.uint64,
+    )
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+def band_keys(sig: np.ndarray) -> list[int]:
+    """One LSH bucket key per band (signed 64-bit, to fit an SQLite INTEGER)."""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = sig[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+        digest = hashlib.blake2b(bytes([band]) + rows, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def from_bytes(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.uint32)
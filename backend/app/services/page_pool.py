@@ -0,0 +1,123 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar
+
+from app.services.metrics import collect_stages, replay_stages
+
+T = TypeVar("T")
+
+# Processes used to extract pages of one PDF in parallel (1 = serial)
+PAGE_WORKERS = int(os.getenv("PAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Documents shorter than this are always processed serially
+MIN_PARALLEL_PAGES = int(os.getenv("MIN_PARALLEL_PAGES", "8"))
+
+# Pages per range when a document is streamed (see iter_page_ranges)
+STREAM_CHUNK_PAGES = 4
+
+# fn(pdf_path, start, stop, on_page=None) -> one result per page in [start, stop);
+# on_page(page_index) is called after each page when given
+PageRangeFn = Callable[..., list[T]]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def _run_range(fn: PageRangeFn, pdf_path: Path, start: int, stop: int) -> tuple[list, list]:
+    # Worker side: hand the stage timings back along with the pages
+    with collect_stages() as stages:
+        return fn(pdf_path, start, stop), stages
+
+
+def page_ranges(page_count: int, chunks: int) -> list[tuple[int, int]]:
+    """Split [0, page_count) into at most ``chunks`` contiguous ranges."""
+    size = max(1, math.ceil(page_count / max(1, chunks)))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def map_page_ranges(
+    fn: PageRangeFn,
+    pdf_path: Path,
+    page_count: int,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    workers: Optional[int] = None,
+) -> list[T]:
+    """
+    Run ``fn`` over page ranges of a PDF and return per-page results in page order.
+
+    With more than one worker the ranges are fanned out to a process pool;
+    otherwise the whole document is processed in this process. Either way
+    the returned list is identical, so callers merge it serially.
+    """
+    workers = PAGE_WORKERS if workers is None else workers
+
+    if workers <= 1 or page_count < MIN_PARALLEL_PAGES:
+        report = (lambda index: on_page(index + 1, page_count)) if on_page else None
+        return fn(pdf_path, 0, page_count, on_page=report)
+
+    # Twice as many ranges as workers keeps cores busy when page costs differ
+    return list(iter_page_ranges(fn, pdf_path, page_count, on_page, workers, chunks=workers * 2))
+
+
+def iter_page_ranges(
+    fn: PageRangeFn,
+    pdf_path: Path,
+    page_count: int,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    workers: Optional[int] = None,
+    chunks: Optional[int] = None,
+) -> Iterator[T]:
+    """
+    Like map_page_ranges, but yields per-page results in page order as soon
+    as every earlier page is done, so consumers can start on the first pages
+    while later ones are still being extracted.
+
+    The document is split into ``chunks`` ranges (default: ranges of
+    STREAM_CHUNK_PAGES pages, so the first pages come out quickly).
+    """
+    workers = PAGE_WORKERS if workers is None else workers
+    ranges = page_ranges(page_count, chunks or math.ceil(page_count / STREAM_CHUNK_PAGES))
+
+    if workers <= 1 or page_count < MIN_PARALLEL_PAGES:
+        report = (lambda index: on_page(index + 1, page_count)) if on_page else None
+        for start, stop in ranges:
+            yield from fn(pdf_path, start, stop, on_page=report)
+        return
+
+    pool = _get_pool(workers)
+    futures = {pool.submit(_run_range, fn, pdf_path, start, stop): start for start, stop in ranges}
+
+    done = 0
+    next_start = 0  # first page not yielded yet
+    by_start: dict[int, list[T]] = {}
+    for future in as_completed(futures):
+        chunk, stages = future.result()
+        replay_stages(stages)
+        by_start[futures[future]] = chunk
+        done += len(chunk)
+        if on_page:
+            on_page(done, page_count)
+
+        while next_start in by_start:
+            chunk = by_start.pop(next_start)
+            next_start += len(chunk)
+            yield from chunk
@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+
+# Budget for serialized quiz payloads (raw + gzip bytes)
+PAYLOAD_CACHE_MAX_BYTES = int(os.getenv("PAYLOAD_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+PAYLOAD_GZIP_LEVEL = 6
+
+
+@dataclass(frozen=True)
+class Payload:
+    """One response body, serialized and compressed once."""
+    body: bytes
+    gzipped: bytes
+    etag: str  # strong ETag of ``body``; the gzip variant uses etag + "-gzip"
+
+    @property
+    def gzip_etag(self) -> str:
+        return self.etag[:-1] + '-gzip"'
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzipped)
+
+
+def make_payload(body: bytes) -> Payload:
+    return Payload(
+        body=body,
+        gzipped=gzip.compress(body, compresslevel=PAYLOAD_GZIP_LEVEL, mtime=0),
+        etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+    )
+
+
+def payload_response(payload: Payload, request: Request, media_type: str = "application/json") -> Response:
+    """
+    Serve a cached payload: 304 when the client's copy is current, gzip
+    when accepted, the raw bytes otherwise.
+    """
+    use_gzip = "gzip" in request.headers.get("accept-encoding", "").lower()
+    etag = payload.gzip_etag if use_gzip else payload.etag
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if any(tag.strip() in (payload.etag, payload.gzip_etag, "*") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(payload.gzipped, media_type=media_type, headers=headers)
+    return Response(payload.body, media_type=media_type, headers=headers)
+
+
+class PayloadCache:
+    """
+    LRU cache of pre-serialized responses for data that never changes
+    (a session's questions are fixed once it is created).
+    """
+
+    def __init__(self, max_bytes: int = PAYLOAD_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, Payload] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, key: str, build: Callable[[], bytes]) -> Payload:
+        payload = self.get(key)
+        if payload is None:
+            payload = make_payload(build())
+            self.put(key, payload)
+        return payload
+
+    def get(self, key: str) -> Optional[Payload]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: str, payload: Payload) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            if payload.size > self.max_bytes:
+                return
+
+            self._entries[key] = payload
+            self._bytes += payload.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+quiz_payloads = PayloadCache()
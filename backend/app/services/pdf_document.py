@@ -0,0 +1,117 @@
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+import fitz  # PyMuPDF
+
+from app.services.figure_extractor import PageFigure, locate_page_figures
+from app.services.figure_store import figure_regions
+from app.services.metrics import stage_timer
+from app.services.page_pool import iter_page_ranges, map_page_ranges
+
+
+@dataclass
+class PageContent:
+    """Everything the extractors need from one page of a question paper."""
+    number: int
+    text: str
+    figures: list[PageFigure] = field(default_factory=list)
+    # question number -> y of its "Q.<n>" marker on this page
+    anchors: dict[int, float] = field(default_factory=dict)
+
+
+@dataclass
+class PdfDocument:
+    pages: list[PageContent]
+
+    @property
+    def figures(self) -> dict[int, list[str]]:
+        """Figure URLs keyed by page number (pages without figures omitted)."""
+        return {p.number: [f.url for f in p.figures] for p in self.pages if p.figures}
+
+
+def _question_anchors(blocks: list[tuple]) -> dict[int, float]:
+    anchors = {}
+    for x0, y0, x1, y1, text, _, block_type in blocks:
+        if block_type != 0:
+            continue
+        lines = text.split("\n")
+        line_height = (y1 - y0) / max(1, len(lines) - 1 if text.endswith("\n") else len(lines))
+        for i, line in enumerate(lines):
+            m = re.match(r"Q\.\s*(\d+)", line)
+            if m:
+                anchors[int(m.group(1))] = y0 + i * line_height
+    return anchors
+
+
+def process_pages(
+    pdf_path: Path,
+    start: int,
+    stop: int,
+    on_page: Optional[Callable[[int], None]] = None,
+) -> list[PageContent]:
+    """
+    Extract pages [start, stop) of a question paper in one pass.
+
+    Text comes from PyMuPDF's block extraction (no per-character layout
+    analysis) and figure regions are located on the same page object; they
+    are recorded for rendering on first request rather than rendered here.
+    """
+    pages = []
+    paper = str(Path(pdf_path).absolute())
+
+    with fitz.open(pdf_path) as doc:
+        for page_index in range(start, stop):
+            page = doc[page_index]
+            blocks = page.get_text("blocks", sort=True)
+
+            # Leading newline so a question at the very top of a page still
+            # matches the "\nQ.<n>" split used by the question extractor
+            text = "\n" + "".join(b[4] for b in blocks if b[6] == 0)
+
+            with stage_timer("figures.locate"):
+                figures = locate_page_figures(page, blocks, paper)
+
+            pages.append(PageContent(
+                number=page_index + 1,
+                text=text,
+                figures=figures,
+                anchors=_question_anchors(blocks),
+            ))
+
+            if on_page:
+                on_page(page_index)
+
+    figure_regions.add(f.region for p in pages for f in p.figures)
+    return pages
+
+
+def process_document(
+    pdf_path: Path,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    workers: Optional[int] = None,
+) -> PdfDocument:
+    """
+    Open a question paper and walk each page once.
+
+    Long papers are split into page ranges processed on a worker pool
+    (see app.services.page_pool); the page list is the same either way.
+    """
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+
+    with stage_timer("questions.pages"):
+        pages = map_page_ranges(process_pages, pdf_path, page_count, on_page, workers)
+    return PdfDocument(pages=pages)
+
+
+def iter_document_pages(
+    pdf_path: Path,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    workers: Optional[int] = None,
+) -> Iterator[PageContent]:
+    """Pages of a question paper in order, each as soon as it (and every page before it) is extracted."""
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+
+    yield from iter_page_ranges(process_pages, pdf_path, page_count, on_page, workers)
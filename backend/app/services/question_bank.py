@@ -0,0 +1,438 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from app.models import BankPaper, BankQuestion, ParsedAnswerKey, Question, QuestionType
+from app.services.figure_store import figure_names
+from app.services.metrics import stage_timer
+from app.services.question_set import question_digest
+
+QUESTION_BANK_PATH = Path(os.getenv("QUESTION_BANK_PATH", "data/questions.db"))
+
+# Search terms are words and numbers; FTS5 operators and quotes in user input are dropped
+SEARCH_TERM = re.compile(r"\w+")
+
+
+def match_expression(query: Optional[str]) -> Optional[str]:
+    """FTS5 MATCH expression for a free-text query (every term must appear)."""
+    terms = SEARCH_TERM.findall(query or "")
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def options_text(options: Optional[dict[str, str]]) -> str:
+    if not options:
+        return ""
+    return "\n".join(f"{k}. {v}" for k, v in sorted(options.items()))
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bank_papers (
+            id TEXT PRIMARY KEY,
+            source TEXT,
+            digest TEXT NOT NULL,  -- question_set.question_digest of its questions
+            question_count INTEGER NOT NULL,
+            answer_key TEXT NOT NULL,
+            added_at REAL NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bank_questions (
+            id INTEGER PRIMARY KEY,
+            paper_id TEXT NOT NULL,
+            number INTEGER NOT NULL,
+            question_type TEXT NOT NULL,
+            text TEXT NOT NULL,
+            options TEXT NOT NULL,
+            data TEXT NOT NULL,
+            canonical_id INTEGER,  -- first-seen near-duplicate (itself if none)
+            signature BLOB,  -- MinHash signature (see app.services.minhash)
+            UNIQUE (paper_id, number)
+        )
+        """
+    )
+    # Banks created before duplicate detection get the columns; their rows are indexed on open
+    columns = {r[1] for r in conn.execute("PRAGMA table_info(bank_questions)")}
+    for column, decl in (("canonical_id", "INTEGER"), ("signature", "BLOB")):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE bank_questions ADD COLUMN {column} {decl}")
+    conn.execute("CREATE INDEX IF NOT EXISTS bank_questions_type ON bank_questions (question_type)")
+    conn.execute("CREATE INDEX IF NOT EXISTS bank_questions_canonical ON bank_questions (canonical_id)")
+    # Full-text index over question text and options; rows live in bank_questions
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS bank_fts USING fts5(
+            text, options,
+            content='bank_questions', content_rowid='id',
+            tokenize='porter unicode61'
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bank_figures (
+            paper_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            PRIMARY KEY (paper_id, name)
+        )
+        """
+    )
+    # MinHash LSH buckets: one row per (band key, question)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bank_lsh (
+            bucket INTEGER NOT NULL,
+            question_id INTEGER NOT NULL,
+            PRIMARY KEY (bucket, question_id)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS bank_lsh_question ON bank_lsh (question_id)")
+    return conn
+
+
+class QuestionBank:
+    """
+    Every parsed paper's questions, answer key and figure references,
+    persisted in SQLite with an FTS5 index over question text and options.
+
+    Quizzes composed from the bank never touch a PDF. Shared by all worker
+    processes (WAL); a paper parsed again replaces its earlier rows unless
+    its questions came out the same.
+
+    Near-duplicates (the same or lightly edited question in another paper
+    or mock test) are found as each paper is added, via MinHash signatures
+    and LSH buckets, and share the id of the first-seen copy.
+    """
+
+    def __init__(self, path: Path = QUESTION_BANK_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None  # opened on first use
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = _connect(self.path)
+            unindexed = conn.execute(
+                "SELECT id, text, options FROM bank_questions WHERE signature IS NULL ORDER BY id"
+            ).fetchall()
+            if unindexed:
+                conn.execute("BEGIN")
+                self._index(conn, unindexed)
+                conn.execute("COMMIT")
+            self._conn = conn
+        return self._conn
+
+    def add_paper(
+        self,
+        paper_id: str,
+        questions: list[Question],
+        answer_key: dict[int, ParsedAnswerKey],
+        source: Optional[str] = None,
+        digest: Optional[str] = None,
+    ) -> dict[int, Question]:
+        """
+        Store a parsed paper (unless it is already stored with the same
+        questions) and find its near-duplicates.
+
+        Returns the canonical copy of every question that duplicates an
+        earlier one, by question number.
+        """
+        digest = digest or question_digest(questions)
+        with self._lock, stage_timer("bank.add"):
+            db = self._db()
+            stored = db.execute("SELECT digest FROM bank_papers WHERE id = ?", (paper_id,)).fetchone()
+            if stored is not None and stored[0] == digest:
+                return self._canonical_copies(db, paper_id)
+
+            key_json = json.dumps({n: a.model_dump(mode="json") for n, a in answer_key.items()})
+            db.execute("BEGIN")
+            try:
+                self._delete(db, paper_id)
+                db.execute(
+                    "INSERT INTO bank_papers (id, source, digest, question_count, answer_key, added_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (paper_id, source, digest, len(questions), key_json, time.time()),
+                )
+                db.executemany(
+                    "INSERT INTO bank_questions (paper_id, number, question_type, text, options, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (paper_id, q.number, q.question_type.value, q.text, options_text(q.options), q.model_dump_json())
+                        for q in questions
+                    ],
+                )
+                db.execute(
+                    "INSERT INTO bank_fts (rowid, text, options) "
+                    "SELECT id, text, options FROM bank_questions WHERE paper_id = ?",
+                    (paper_id,),
+                )
+                db.executemany(
+                    "INSERT OR IGNORE INTO bank_figures (paper_id, name) VALUES (?, ?)",
+                    [(paper_id, name) for name in figure_names(url for q in questions for url in (q.images or []))],
+                )
+                with stage_timer("bank.dedupe"):
+                    self._index(db, db.execute(
+                        "SELECT id, text, options FROM bank_questions WHERE paper_id = ? ORDER BY number", (paper_id,)
+                    ).fetchall())
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            return self._canonical_copies(db, paper_id)
+
+    @staticmethod
+    def _index(db: sqlite3.Connection, rows: list[tuple[int, str, str]]) -> None:
+        """
+        Sign (id, text, options) rows and point each at its canonical copy:
+        the best match at or above DUPLICATE_THRESHOLD among the questions
+        sharing an LSH bucket with it, or itself.
+
+        Only bucket-mates are compared, so the cost grows with the number
+        of near matches rather than with the size of the bank.
+        """
+        # NumPy loads with the first banked paper, not at API startup
+        from app.services import minhash
+
+        signed = [(qid, minhash.signature(f"{text}\n{options}")) for qid, text, options in rows]
+        keys = {qid: minhash.band_keys(sig) for qid, sig in signed}
+
+        # bucket -> [(question id, canonical id, signature)] of already indexed questions
+        buckets: dict[int, list] = {}
+        wanted = sorted({key for ks in keys.values() for key in ks})
+        for i in range(0, len(wanted), 500):
+            chunk = wanted[i:i + 500]
+            for bucket, qid, canonical, blob in db.execute(
+                "SELECT l.bucket, q.id, q.canonical_id, q.signature FROM bank_lsh l "
+                f"JOIN bank_questions q ON q.id = l.question_id WHERE l.bucket IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            ):
+                buckets.setdefault(bucket, []).append((qid, canonical, minhash.from_bytes(blob)))
+
+        updates, lsh = [], []
+        for qid, sig in signed:
+            canonical, best, compared = qid, 0.0, set()
+            for key in keys[qid]:
+                for other, other_canonical, other_sig in buckets.get(key, ()):
+                    if other in compared:
+                        continue
+                    compared.add(other)
+                    score = minhash.similarity(sig, other_sig)
+                    if score >= minhash.DUPLICATE_THRESHOLD and score > best:
+                        canonical, best = other_canonical, score
+
+            updates.append((canonical, sig.tobytes(), qid))
+            for key in keys[qid]:
+                lsh.append((key, qid))
+                # Later rows of the same batch can match this one
+                buckets.setdefault(key, []).append((qid, canonical, sig))
+
+        db.executemany("UPDATE bank_questions SET canonical_id = ?, signature = ? WHERE id = ?", updates)
+        db.executemany("INSERT OR IGNORE INTO bank_lsh (bucket, question_id) VALUES (?, ?)", lsh)
+
+    @staticmethod
+    def _canonical_copies(db: sqlite3.Connection, paper_id: str) -> dict[int, Question]:
+        rows = db.execute(
+            "SELECT q.number, c.data FROM bank_questions q JOIN bank_questions c ON c.id = q.canonical_id "
+            "WHERE q.paper_id = ? AND c.id != q.id",
+            (paper_id,),
+        ).fetchall()
+        return {number: Question.model_validate_json(data) for number, data in rows}
+
+    def delete_paper(self, paper_id: str) -> bool:
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN")
+            try:
+                deleted = self._delete(db, paper_id)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return deleted
+
+    @staticmethod
+    def _delete(db: sqlite3.Connection, paper_id: str) -> bool:
+        # Duplicates in other papers whose canonical copy goes away move to
+        # the oldest remaining member of their cluster
+        orphans = db.execute(
+            "SELECT id, canonical_id FROM bank_questions WHERE paper_id != ? AND canonical_id IN "
+            "(SELECT id FROM bank_questions WHERE paper_id = ?) ORDER BY id",
+            (paper_id, paper_id),
+        ).fetchall()
+        successors: dict[int, int] = {}
+        for qid, canonical in orphans:
+            successors.setdefault(canonical, qid)
+        db.executemany(
+            "UPDATE bank_questions SET canonical_id = ? WHERE id = ?",
+            [(successors[canonical], qid) for qid, canonical in orphans],
+        )
+        db.execute(
+            "DELETE FROM bank_lsh WHERE question_id IN (SELECT id FROM bank_questions WHERE paper_id = ?)",
+            (paper_id,),
+        )
+
+        # External-content FTS rows are removed by replaying the indexed values
+        db.execute(
+            "INSERT INTO bank_fts (bank_fts, rowid, text, options) "
+            "SELECT 'delete', id, text, options FROM bank_questions WHERE paper_id = ?",
+            (paper_id,),
+        )
+        db.execute("DELETE FROM bank_questions WHERE paper_id = ?", (paper_id,))
+        db.execute("DELETE FROM bank_figures WHERE paper_id = ?", (paper_id,))
+        return db.execute("DELETE FROM bank_papers WHERE id = ?", (paper_id,)).rowcount > 0
+
+    def papers(self) -> list[BankPaper]:
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT id, source, question_count, added_at FROM bank_papers ORDER BY added_at"
+            ).fetchall()
+        return [BankPaper(id=r[0], source=r[1], question_count=r[2], added_at=r[3]) for r in rows]
+
+    @staticmethod
+    def _filter(
+        query: Optional[str],
+        question_types: Optional[Iterable[QuestionType]],
+        paper_ids: Optional[Iterable[str]],
+    ) -> tuple[str, list, bool]:
+        """(FROM ... WHERE ... clause, its parameters, whether it runs a full-text match)."""
+        match = match_expression(query)
+        sql = "FROM bank_questions q"
+        where, params = [], []
+        if match:
+            sql += " JOIN bank_fts ON bank_fts.rowid = q.id"
+            where.append("bank_fts MATCH ?")
+            params.append(match)
+        for column, values in (("q.question_type", question_types), ("q.paper_id", paper_ids)):
+            if values:
+                values = [getattr(v, "value", v) for v in values]
+                where.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params += values
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql, params, bool(match)
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        question_types: Optional[Iterable[QuestionType]] = None,
+        paper_ids: Optional[Iterable[str]] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> tuple[int, list[BankQuestion]]:
+        """(total matches, one page of them); best matches first when there is a query."""
+        sql, params, matched = self._filter(query, question_types, paper_ids)
+        snippet = "snippet(bank_fts, 0, '[', ']', '…', 16)" if matched else "NULL"
+        order = "bm25(bank_fts)" if matched else "q.id"
+
+        with self._lock, stage_timer("bank.search"):
+            db = self._db()
+            total = db.execute(f"SELECT COUNT(*) {sql}", params).fetchone()[0]
+            rows = db.execute(
+                f"SELECT q.id, q.paper_id, q.canonical_id, q.data, {snippet} {sql} "
+                f"ORDER BY {order} LIMIT ? OFFSET ?",
+                [*params, limit, offset],
+            ).fetchall()
+
+        return total, [_bank_question(*row) for row in rows]
+
+    def compose(
+        self,
+        query: Optional[str] = None,
+        question_types: Optional[Iterable[QuestionType]] = None,
+        paper_ids: Optional[Iterable[str]] = None,
+        limit: int = 30,
+        shuffle: bool = False,
+    ) -> list[Question]:
+        """
+        Up to ``limit`` matching questions (with answers), ready for a quiz
+        session: one per duplicate cluster, renumbered 1..n since numbers
+        repeat across papers.
+        """
+        sql, params, matched = self._filter(query, question_types, paper_ids)
+        order = "random()" if shuffle else "bm25(bank_fts)" if matched else "q.id"
+
+        with self._lock, stage_timer("bank.compose"):
+            rows = self._db().execute(
+                f"""
+                WITH hits AS (SELECT q.data AS data, q.canonical_id AS canonical_id, {order} AS rank {sql})
+                SELECT data FROM (
+                    SELECT data, rank, ROW_NUMBER() OVER (PARTITION BY canonical_id ORDER BY rank) AS nth FROM hits
+                ) WHERE nth = 1 ORDER BY rank LIMIT ?
+                """,
+                [*params, limit],
+            ).fetchall()
+
+        return [
+            Question.model_validate_json(data).model_copy(update={"number": i})
+            for i, (data,) in enumerate(rows, start=1)
+        ]
+
+    def duplicate_clusters(self, limit: int = 20, offset: int = 0) -> tuple[int, list[tuple[int, list[BankQuestion]]]]:
+        """(number of clusters, one page of (canonical id, members)); largest clusters first."""
+        with self._lock:
+            db = self._db()
+            total = db.execute(
+                "SELECT COUNT(*) FROM (SELECT canonical_id FROM bank_questions GROUP BY canonical_id HAVING COUNT(*) > 1)"
+            ).fetchone()[0]
+            page = [r[0] for r in db.execute(
+                "SELECT canonical_id FROM bank_questions GROUP BY canonical_id HAVING COUNT(*) > 1 "
+                "ORDER BY COUNT(*) DESC, canonical_id LIMIT ? OFFSET ?",
+                (limit, offset),
+            )]
+            rows = db.execute(
+                "SELECT id, paper_id, canonical_id, data, NULL FROM bank_questions "
+                f"WHERE canonical_id IN ({', '.join('?' * len(page))}) ORDER BY id",
+                page,
+            ).fetchall() if page else []
+
+        members: dict[int, list[BankQuestion]] = {canonical: [] for canonical in page}
+        for row in rows:
+            members[row[2]].append(_bank_question(*row))
+        return total, list(members.items())
+
+    def referenced_figures(self) -> set[str]:
+        """Names of the figures bank questions point at (kept alive by figure GC)."""
+        with self._lock:
+            return {r[0] for r in self._db().execute("SELECT DISTINCT name FROM bank_figures")}
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            db = self._db()
+            papers = db.execute("SELECT COUNT(*) FROM bank_papers").fetchone()[0]
+            questions = db.execute("SELECT COUNT(*) FROM bank_questions").fetchone()[0]
+            duplicates = db.execute("SELECT COUNT(*) FROM bank_questions WHERE canonical_id != id").fetchone()[0]
+        return {"papers": papers, "questions": questions, "duplicates": duplicates}
+
+
+def _bank_question(row_id: int, paper_id: str, canonical_id: int, data: str, snippet: Optional[str]) -> BankQuestion:
+    q = Question.model_validate_json(data)
+    return BankQuestion(
+        id=row_id,
+        paper_id=paper_id,
+        canonical_id=canonical_id,
+        number=q.number,
+        text=q.text,
+        question_type=q.question_type,
+        options=q.options,
+        images=q.images,
+        figures=q.figures,
+        snippet=snippet,
+    )
+
+
+question_bank = QuestionBank()
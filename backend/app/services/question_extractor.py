@@ -1,62 +1,209 @@
+import itertools
+import math
 import re
+from collections import Counter
+from dataclasses import dataclass, field
 from pathlib import Path
-import pdfplumber
+from typing import Iterable, Iterator, Optional
 
-from app.models import Question, QuestionType, ParsedAnswerKey
-from app.services.figure_extractor import extract_figures
+from app.models import FigureImage, Question, QuestionType, ParsedAnswerKey
+from app.services.metrics import stage_timer
+from app.services.pdf_document import PageContent, PdfDocument, process_document
+
+
+# Lines this close to the top/bottom of a page may be running headers/footers
+EDGE_LINES = 2
+
+# ...if they repeat at the same edge on this share of the pages, and on at
+# least FURNITURE_MIN_PAGES pages (shorter papers are never stripped)
+FURNITURE_SHARE = 0.8
+FURNITURE_MIN_PAGES = 3
+
+# A figure starting slightly above its question marker (pt) still belongs to it
+ANCHOR_TOLERANCE = 4
+
+# Pages read before streaming starts, to learn running headers/footers from
+FURNITURE_SAMPLE_PAGES = 6
+
+QUESTION_MARKER = re.compile(r"\nQ\.\s*(\d+)")
+OPTION = re.compile(r"\(([A-D])\)\s*([^\n]+)")
+OPTION_MARKER = re.compile(r"\([A-D]\)")
+DIGITS = re.compile(r"\d+")
+# Question markers, options and stems ("Which one of the following is CORRECT?")
+# are question text however often they repeat
+FURNITURE_EXEMPT = re.compile(r"Q\.\s*#|\([A-D]\)|.*[?:]$")
+
+
+@dataclass
+class PageFurniture:
+    """Normalized running header (top) and footer (bottom) lines of a paper."""
+    top: set[str] = field(default_factory=set)
+    bottom: set[str] = field(default_factory=set)
+
+
+def _normalize_line(line: str) -> str:
+    # Page numbers differ between pages ("CS 3 / 25"), so compare without digits
+    return DIGITS.sub("#", line.strip())
+
+
+def _page_furniture(pages: list[PageContent]) -> PageFurniture:
+    """Lines repeated at the same edge of nearly every page."""
+    if len(pages) < FURNITURE_MIN_PAGES:
+        return PageFurniture()
+
+    top: Counter[str] = Counter()
+    bottom: Counter[str] = Counter()
+    for page in pages:
+        lines = [_normalize_line(line) for line in page.text.split("\n") if line.strip()]
+        top.update(set(lines[:EDGE_LINES]))
+        bottom.update(set(lines[-EDGE_LINES:]))
+
+    threshold = max(FURNITURE_MIN_PAGES, math.ceil(len(pages) * FURNITURE_SHARE))
+
+    def repeated(counts: Counter[str]) -> set[str]:
+        return {line for line, n in counts.items() if n >= threshold and not FURNITURE_EXEMPT.match(line)}
+
+    return PageFurniture(top=repeated(top), bottom=repeated(bottom))
+
+
+def _strip_furniture(text: str, furniture: PageFurniture) -> str:
+    lines = text.split("\n")
+    while lines and (not lines[0].strip() or _normalize_line(lines[0]) in furniture.top):
+        lines.pop(0)
+    while lines and (not lines[-1].strip() or _normalize_line(lines[-1]) in furniture.bottom):
+        lines.pop()
+    return "\n" + "\n".join(lines) + "\n"
+
+
+def _figure_owner(top: float, anchors: dict[int, float], previous: Optional[int]) -> Optional[int]:
+    owner, owner_y = previous, float("-inf")
+    for qno, y in anchors.items():
+        if owner_y <= y <= top + ANCHOR_TOLERANCE:
+            owner, owner_y = qno, y
+    return owner
 
 
 def extract_questions_from_pdf(
     pdf_path: Path,
     answer_key: dict[int, ParsedAnswerKey]
 ) -> list[Question]:
+    return parse_questions(process_document(pdf_path), answer_key)
+
+
+def _build_question(
+    qno: int,
+    body: str,
+    images: list[str],
+    figures: list[FigureImage],
+    answer_key: dict[int, ParsedAnswerKey],
+) -> Question:
+    options = dict(OPTION.findall(body)) or None
+    qtext = OPTION_MARKER.split(body)[0].strip()
+
+    ak = answer_key.get(qno)
+    if ak:
+        qtype = ak.answer_type
+        correct = ak.answer
+    else:
+        qtype = QuestionType.MCQ_SINGLE if options else QuestionType.NAT_INTEGER
+        correct = None
+
+    return Question(
+        number=qno,
+        text=qtext,
+        question_type=qtype,
+        options=options if qtype in (
+            QuestionType.MCQ_SINGLE,
+            QuestionType.MCQ_MULTIPLE
+        ) else None,
+        correct_answer=correct,
+        images=images,
+        figures=figures or None,
+    )
+
+
+def iter_questions(
+    pages: Iterable[PageContent],
+    answer_key: dict[int, ParsedAnswerKey],
+    furniture: Optional[PageFurniture] = None,
+) -> Iterator[Question]:
+    """
+    Yield questions in paper order as soon as they are complete.
+
+    A question is complete at the end of the page on which a later
+    question marker appears; until then its text and figures may still
+    continue on the next page. Without ``furniture``, running headers and
+    footers are learned from the first FURNITURE_SAMPLE_PAGES pages, so the
+    first questions come out before the rest of the paper is read.
+    """
+    pages = iter(pages)
+    if furniture is None:
+        sample = list(itertools.islice(pages, FURNITURE_SAMPLE_PAGES))
+        furniture = _page_furniture(sample)
+        pages = itertools.chain(sample, pages)
+
+    # qno -> (body parts, image urls, figures) of questions not yielded yet
+    pending: dict[int, tuple[list[str], list[str], list[FigureImage]]] = {}
+    last_qno = None
+
+    for page in pages:
+        parts = QUESTION_MARKER.split(_strip_furniture(page.text, furniture))
+
+        # Text before the first question marker continues the previous
+        # page's last question (e.g. its options spilled onto this page)
+        if last_qno is not None and parts[0].strip():
+            pending[last_qno][0].append(parts[0])
+
+        # Each figure belongs to the question whose marker is the last one
+        # above it; figures above the first marker continue last_qno
+        owners = [
+            (fig, _figure_owner(fig.top, page.anchors, last_qno))
+            for fig in page.figures
+        ]
+
+        for qno, body in zip(parts[1::2], parts[2::2]):
+            last_qno = int(qno)
+            pending[last_qno] = ([body], [], [])
+
+        for fig, owner in owners:
+            if owner in pending:
+                pending[owner][1].append(fig.url)
+                pending[owner][2].append(fig.image)
+
+        for qno in [q for q in pending if q != last_qno]:
+            body, images, figures = pending.pop(qno)
+            yield _build_question(qno, "".join(body), images, figures, answer_key)
+
+    for qno, (body, images, figures) in pending.items():
+        yield _build_question(qno, "".join(body), images, figures, answer_key)
+
+
+def settle_streamed_questions(
+    document: PdfDocument,
+    answer_key: dict[int, ParsedAnswerKey],
+    streamed: dict[int, Question],
+) -> list[Question]:
+    """
+    The questions of a paper that was streamed with ``iter_questions``,
+    identical to what ``parse_questions`` returns for it.
+
+    The stream learned headers and footers from its first pages only; if
+    the whole paper's furniture differs (e.g. it only starts after some
+    instruction pages), the questions are parsed again with it.
+    """
+    if _page_furniture(document.pages) != _page_furniture(document.pages[:FURNITURE_SAMPLE_PAGES]):
+        return parse_questions(document, answer_key)
+    return [streamed[qno] for qno in sorted(streamed)]
+
 
-    page_figures = extract_figures(pdf_path)
-    questions = {}
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_no, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text() or ""
-            parts = re.split(r"\nQ\.\s*(\d+)", text)
-
-            i = 1
-            while i < len(parts) - 1:
-                qno = int(parts[i])
-                body = parts[i + 1]
-
-                options = dict(re.findall(r"\(([A-D])\)\s*([^\n]+)", body))
-                qtext = re.split(r"\([A-D]\)", body)[0].strip()
-
-                questions[qno] = {
-                    "text": qtext,
-                    "options": options if options else None,
-                    "images": page_figures.get(page_no, [])
-                }
-                i += 2
-
-    result = []
-
-    for qno in sorted(questions):
-        qd = questions[qno]
-        ak = answer_key.get(qno)
-
-        if ak:
-            qtype = ak.answer_type
-            correct = ak.answer
-        else:
-            qtype = QuestionType.MCQ_SINGLE if qd["options"] else QuestionType.NAT_INTEGER
-            correct = None
-
-        result.append(Question(
-            number=qno,
-            text=qd["text"],
-            question_type=qtype,
-            options=qd["options"] if qtype in (
-                QuestionType.MCQ_SINGLE,
-                QuestionType.MCQ_MULTIPLE
-            ) else None,
-            correct_answer=correct,
-            images=qd["images"]
-        ))
-
-    return result
+@stage_timer("questions.parse")
+def parse_questions(
+    document: PdfDocument,
+    answer_key: dict[int, ParsedAnswerKey]
+) -> list[Question]:
+    """All questions of a parsed paper, by number (a repeated number keeps its last occurrence)."""
+    questions = {
+        q.number: q
+        for q in iter_questions(document.pages, answer_key, _page_furniture(document.pages))
+    }
+    return [questions[qno] for qno in sorted(questions)]
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from enum import Enum
+from typing import Iterator, Optional, Sequence
+
+from pydantic import BaseModel
+
+from app.models import Question
+
+# Question sets kept alive with no session holding them (SQLite-backed
+# sessions are loaded per request and would otherwise re-intern every time)
+QUESTION_SET_CACHE_SIZE = int(os.getenv("QUESTION_SET_CACHE_SIZE", "64"))
+
+
+def deep_size(obj: object, seen: Optional[set[int]] = None) -> int:
+    """Approximate bytes held by ``obj`` and everything it references (each object counted once)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, Enum):
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif isinstance(obj, BaseModel):
+        size += deep_size(obj.__dict__, seen) + deep_size(obj.__pydantic_fields_set__, seen)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_size(getattr(obj, s, None), seen) for s in obj.__slots__ if s != "__weakref__")
+    return size
+
+
+class CompactQuestion:
+    """
+    Read-only question record shared by every session of the same paper.
+
+    Has the attributes of models.Question, so scoring, hint prompts and
+    review code take either; strings are interned and there is no
+    per-instance dict or validation state.
+    """
+    __slots__ = ("number", "text", "question_type", "options", "correct_answer", "images", "figures")
+
+    def __init__(self, q: Question):
+        self.number = q.number
+        self.text = sys.intern(q.text)
+        self.question_type = q.question_type
+        self.options = {sys.intern(k): sys.intern(v) for k, v in q.options.items()} if q.options else q.options
+        self.correct_answer = q.correct_answer
+        self.images = tuple(sys.intern(url) for url in q.images) if q.images is not None else None
+        self.figures = tuple(q.figures) if q.figures is not None else None
+
+    def to_model(self) -> Question:
+        return Question(
+            number=self.number,
+            text=self.text,
+            question_type=self.question_type,
+            options=self.options,
+            correct_answer=self.correct_answer,
+            images=self.images,
+            figures=self.figures,
+        )
+
+
+class QuestionSet:
+    """The questions of one paper, built once and shared by all its sessions."""
+    __slots__ = ("digest", "questions", "size", "_by_number", "_json", "__weakref__")
+
+    def __init__(self, digest: str, questions: Sequence[Question]):
+        self.digest = digest
+        self.questions = tuple(CompactQuestion(q) for q in questions)
+        self._by_number = {q.number: q for q in self.questions}
+        self._json: Optional[str] = None
+        self.size = deep_size(self.questions) + deep_size(self._by_number, {id(q) for q in self.questions})
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def __iter__(self) -> Iterator[CompactQuestion]:
+        return iter(self.questions)
+
+    def question(self, number: int) -> Optional[CompactQuestion]:
+        return self._by_number.get(number)
+
+    def to_json(self) -> str:
+        """JSON array of the questions (serialized once)."""
+        if self._json is None:
+            self._json = "[" + ",".join(q.to_model().model_dump_json() for q in self.questions) + "]"
+        return self._json
+
+
+class CompactSession:
+    """A quiz session: its id and the (shared) question set."""
+    __slots__ = ("id", "question_set")
+
+    def __init__(self, session_id: str, question_set: QuestionSet):
+        self.id = session_id
+        self.question_set = question_set
+
+    @property
+    def questions(self) -> tuple[CompactQuestion, ...]:
+        return self.question_set.questions
+
+    @property
+    def total_questions(self) -> int:
+        return len(self.question_set)
+
+    def question(self, number: int) -> Optional[CompactQuestion]:
+        return self.question_set.question(number)
+
+    @property
+    def own_size(self) -> int:
+        """Bytes of the session record itself, excluding the shared question set."""
+        return sys.getsizeof(self) + sys.getsizeof(self.id)
+
+
+def session_memory(session: CompactSession, shared_by: int = 1) -> dict[str, int]:
+    """
+    Memory held for one session: its own record, the shared question set
+    and the set's cost split across the ``shared_by`` sessions using it,
+    next to what the same session costs as Pydantic models.
+    """
+    models = [q.to_model() for q in session.questions]
+    return {
+        "questions": session.total_questions,
+        "session_bytes": session.own_size,
+        "question_set_bytes": session.question_set.size,
+        "shared_by": shared_by,
+        "bytes_per_session": session.own_size + session.question_set.size // max(shared_by, 1),
+        "pydantic_bytes": deep_size(session.id) + deep_size(models),
+    }
+
+
+def question_digest(questions: Sequence[Question]) -> str:
+    h = hashlib.sha256()
+    for q in questions:
+        h.update(q.model_dump_json().encode())
+        h.update(b"\n")
+    return h.hexdigest()[:32]
+
+
+class QuestionSetRegistry:
+    """
+    Interns question sets by content: every session of the same paper,
+    however it was created or loaded, points at one QuestionSet.
+    """
+
+    def __init__(self, cache_size: int = QUESTION_SET_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._sets: weakref.WeakValueDictionary[str, QuestionSet] = weakref.WeakValueDictionary()
+        self._recent: OrderedDict[str, QuestionSet] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Optional[QuestionSet]:
+        with self._lock:
+            question_set = self._sets.get(digest)
+            if question_set is not None:
+                self._keep(question_set)
+            return question_set
+
+    def intern(self, questions: Sequence[Question], digest: Optional[str] = None) -> QuestionSet:
+        digest = digest or question_digest(questions)
+        with self._lock:
+            question_set = self._sets.get(digest)
+            if question_set is None:
+                question_set = self._sets[digest] = QuestionSet(digest, questions)
+            self._keep(question_set)
+            return question_set
+
+    def _keep(self, question_set: QuestionSet) -> None:
+        self._recent[question_set.digest] = question_set
+        self._recent.move_to_end(question_set.digest)
+        while len(self._recent) > self.cache_size:
+            self._recent.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            sets = list(self._sets.values())
+        return {"question_sets": len(sets), "bytes": sum(s.size for s in sets)}
+
+
+question_sets = QuestionSetRegistry()
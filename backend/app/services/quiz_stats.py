@@ -0,0 +1,335 @@
+import json
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+from uuid import uuid4
+
+from app.models import AnswerSheet, BatchQuizResult, Question, QuestionType, QuizResult
+from app.services.scorer import is_attempted
+
+STATS_DB_PATH = Path(os.getenv("STATS_DB_PATH", "data/stats.db"))
+STATS_TTL_SECONDS = int(os.getenv("STATS_TTL_SECONDS", str(30 * 24 * 3600)))
+# Expired rows are swept at most this often per process, not on every submission
+STATS_SWEEP_INTERVAL_SECONDS = 3600
+# A process's stats slot is handed to another process after this long without a write
+STATS_SLOT_TIMEOUT_SECONDS = int(os.getenv("STATS_SLOT_TIMEOUT_SECONDS", "600"))
+# Sessions whose partial aggregates this process keeps in memory
+STATS_MAX_SESSIONS = int(os.getenv("STATS_MAX_SESSIONS", "1000"))
+
+# Distinct NAT values tracked per question; rarer ones are counted as "other"
+NAT_MAX_DISTINCT = 50
+
+CHOICE_TYPES = (QuestionType.MCQ_SINGLE, QuestionType.MCQ_MULTIPLE)
+NAT_TYPES = (QuestionType.NAT_INTEGER, QuestionType.NAT_DECIMAL)
+
+
+@dataclass
+class NatSummary:
+    """Streaming summary of numeric answers (Welford; merged with Chan et al.)."""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+    values: Counter = field(default_factory=Counter)
+    other: int = 0
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        self._count_value(f"{x:g}", 1)
+
+    def _count_value(self, key: str, n: int) -> None:
+        if key in self.values or len(self.values) < NAT_MAX_DISTINCT:
+            self.values[key] += n
+        else:
+            self.other += n
+
+    def merge(self, other: "NatSummary") -> None:
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for key, n in other.values.items():
+            self._count_value(key, n)
+        self.other += other.other
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+
+@dataclass
+class QuestionAggregate:
+    question_type: QuestionType
+    attempts: int = 0
+    correct: int = 0
+    unattempted: int = 0
+    choices: Counter = field(default_factory=Counter)
+    nat: NatSummary = field(default_factory=NatSummary)
+
+    def merge(self, other: "QuestionAggregate") -> None:
+        self.attempts += other.attempts
+        self.correct += other.correct
+        self.unattempted += other.unattempted
+        self.choices.update(other.choices)
+        self.nat.merge(other.nat)
+
+
+@dataclass
+class SessionAggregate:
+    """
+    Everything learned from a session's submissions, without the submissions.
+
+    ``fold`` adds one scored result in O(questions) (``fold_batch`` a
+    whole graded batch); ``merge`` combines partial aggregates (e.g. from
+    different worker processes).
+    """
+    submissions: int = 0
+    score_sum: float = 0.0
+    questions: dict[int, QuestionAggregate] = field(default_factory=dict)
+
+    def fold(self, result: QuizResult) -> None:
+        self._fold_sheet(
+            result.score_percentage,
+            ((r.question_number, r.question_type, r.user_answer, r.is_correct) for r in result.results),
+        )
+
+    def fold_batch(self, questions: list[Question], sheets: list[AnswerSheet], result: BatchQuizResult) -> None:
+        """Fold every sheet of a batch scored with include_results (see batch_scorer.score_batch)."""
+        for sheet, score in zip(sheets, result.sheets):
+            answers = {sub.question_number: sub.answer for sub in sheet.answers}
+            self._fold_sheet(
+                score.score_percentage,
+                (
+                    (q.number, q.question_type, answers.get(q.number), is_correct)
+                    for q, is_correct in zip(questions, score.is_correct)
+                ),
+            )
+
+    def _fold_sheet(self, score_percentage: float, results: Iterable[tuple]) -> None:
+        self.submissions += 1
+        self.score_sum += score_percentage
+
+        for number, question_type, answer, is_correct in results:
+            agg = self.questions.get(number)
+            if agg is None:
+                agg = self.questions[number] = QuestionAggregate(question_type)
+
+            if not is_attempted(answer):
+                agg.unattempted += 1
+                continue
+
+            agg.attempts += 1
+            agg.correct += is_correct
+
+            if question_type in CHOICE_TYPES:
+                choices = answer if isinstance(answer, list) else [answer]
+                agg.choices.update(str(c).strip().upper() for c in choices)
+            elif question_type in NAT_TYPES:
+                try:
+                    value = float(answer)
+                except (ValueError, TypeError):
+                    continue
+                if math.isfinite(value):
+                    agg.nat.add(value)
+
+    def merge(self, other: "SessionAggregate") -> None:
+        self.submissions += other.submissions
+        self.score_sum += other.score_sum
+        for number, agg in other.questions.items():
+            mine = self.questions.get(number)
+            if mine is None:
+                mine = self.questions[number] = QuestionAggregate(agg.question_type)
+            mine.merge(agg)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "submissions": self.submissions,
+            "score_sum": self.score_sum,
+            "questions": {
+                str(number): {
+                    "type": agg.question_type.value,
+                    "attempts": agg.attempts,
+                    "correct": agg.correct,
+                    "unattempted": agg.unattempted,
+                    "choices": agg.choices,
+                    "nat": [agg.nat.count, agg.nat.mean, agg.nat.m2, agg.nat.min, agg.nat.max,
+                            agg.nat.values, agg.nat.other] if agg.nat.count else None,
+                }
+                for number, agg in self.questions.items()
+            },
+        })
+
+    @classmethod
+    def from_json(cls, data: str) -> "SessionAggregate":
+        raw = json.loads(data)
+        session = cls(submissions=raw["submissions"], score_sum=raw["score_sum"])
+        for number, q in raw["questions"].items():
+            agg = QuestionAggregate(
+                QuestionType(q["type"]),
+                attempts=q["attempts"],
+                correct=q["correct"],
+                unattempted=q["unattempted"],
+                choices=Counter(q["choices"]),
+            )
+            if q["nat"]:
+                count, mean, m2, lo, hi, values, other = q["nat"]
+                agg.nat = NatSummary(count, mean, m2, lo, hi, Counter(values), other)
+            session.questions[int(number)] = agg
+        return session
+
+
+class QuizStats:
+    """
+    Per-session answer analytics.
+
+    Each process folds its own submissions into a partial aggregate and
+    writes it to its own SQLite row; readers merge the rows of a session.
+    No row is ever read-modified-written by two processes.
+
+    Rows are keyed by a slot rather than by process: a process leases the
+    lowest slot no live process holds, renews the lease with every write
+    and, like a process that restarted, continues the partials found under
+    it. A session therefore has at most one row per concurrently running
+    process, however often workers restart.
+
+    Reads and writes hit SQLite: call them off the event loop.
+    """
+
+    def __init__(self, path: Path = STATS_DB_PATH, ttl: int = STATS_TTL_SECONDS):
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex}"
+        self.worker: Optional[str] = None  # slot, leased on the first write
+        self._partials: OrderedDict[str, SessionAggregate] = OrderedDict()
+        self._swept_at = 0.0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS session_stats (
+                session_id TEXT NOT NULL,
+                worker TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (session_id, worker)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS session_stats_updated ON session_stats (updated_at)")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stats_slots (
+                slot INTEGER PRIMARY KEY,
+                holder TEXT NOT NULL,
+                seen_at REAL NOT NULL
+            )
+            """
+        )
+
+    def _lease_slot(self, now: float) -> None:
+        """Renew this process's slot, or take a free one if it lost it (inside a write transaction)."""
+        if self.worker is not None and self._conn.execute(
+            "UPDATE stats_slots SET seen_at = ? WHERE slot = ? AND holder = ?",
+            (now, int(self.worker), self.holder),
+        ).rowcount:
+            return
+
+        row = self._conn.execute(
+            "SELECT slot FROM stats_slots WHERE seen_at < ? ORDER BY slot LIMIT 1",
+            (now - STATS_SLOT_TIMEOUT_SECONDS,),
+        ).fetchone() or self._conn.execute("SELECT COALESCE(MAX(slot) + 1, 0) FROM stats_slots").fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO stats_slots (slot, holder, seen_at) VALUES (?, ?, ?)",
+            (row[0], self.holder, now),
+        )
+        self.worker = str(row[0])
+        # What was folded so far is saved under the old slot, which its new holder continues
+        self._partials.clear()
+
+    def _partial(self, session_id: str) -> SessionAggregate:
+        partial = self._partials.get(session_id)
+        if partial is None:
+            # Evicted earlier: continue from what this process already wrote
+            row = self._conn.execute(
+                "SELECT data FROM session_stats WHERE session_id = ? AND worker = ?",
+                (session_id, self.worker),
+            ).fetchone()
+            partial = SessionAggregate.from_json(row[0]) if row else SessionAggregate()
+            self._partials[session_id] = partial
+            while len(self._partials) > STATS_MAX_SESSIONS:
+                self._partials.popitem(last=False)
+        self._partials.move_to_end(session_id)
+        return partial
+
+    def record(self, session_id: str, result: QuizResult) -> None:
+        with self._lock:
+            self._write(session_id, lambda partial: partial.fold(result))
+
+    def record_batch(
+        self,
+        session_id: str,
+        questions: list[Question],
+        sheets: list[AnswerSheet],
+        result: BatchQuizResult,
+    ) -> None:
+        """Fold a graded batch (scored with include_results) as one write."""
+        with self._lock:
+            self._write(session_id, lambda partial: partial.fold_batch(questions, sheets, result))
+
+    def _write(self, session_id: str, fold: Callable[[SessionAggregate], None]) -> None:
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._lease_slot(now)
+            partial = self._partial(session_id)
+            fold(partial)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO session_stats (session_id, worker, data, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (session_id, self.worker, partial.to_json(), now),
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            # The in-memory partial may hold the rolled-back fold
+            self._partials.pop(session_id, None)
+            raise
+
+        if now - self._swept_at > STATS_SWEEP_INTERVAL_SECONDS:
+            self._conn.execute("DELETE FROM session_stats WHERE updated_at < ?", (now - self.ttl,))
+            self._swept_at = now
+
+    def get(self, session_id: str) -> Optional[SessionAggregate]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM session_stats WHERE session_id = ?", (session_id,)
+            ).fetchall()
+        if not rows:
+            return None
+        total = SessionAggregate()
+        for (data,) in rows:
+            total.merge(SessionAggregate.from_json(data))
+        return total
+
+
+quiz_stats = QuizStats()
@@ -7,6 +7,7 @@ from app.models import (
     QuestionResult,
     QuizResult
 )
+from app.services.metrics import stage_timer
 
 
 # Default tolerance for NAT decimal answers
@@ -118,6 +119,16 @@ def _score_nat_decimal(user_answer: Union[str, list[str], float, None], correct:
         return False
 
 
+def is_attempted(user_answer: Union[str, list[str], float, None]) -> bool:
+    """Blank strings and empty selections count as unattempted."""
+    if isinstance(user_answer, str):
+        return bool(user_answer.strip())
+    if isinstance(user_answer, list):
+        return len(user_answer) > 0
+    return user_answer is not None
+
+
+@stage_timer("score")
 def score_quiz(
     session_id: str,
     questions: list[Question],
@@ -147,14 +158,7 @@ def score_quiz(
     for question in questions:
         user_answer = answer_map.get(question.number)
 
-        # Check if attempted
-        is_attempted = user_answer is not None
-        if isinstance(user_answer, str):
-            is_attempted = bool(user_answer.strip())
-        elif isinstance(user_answer, list):
-            is_attempted = len(user_answer) > 0
-
-        if not is_attempted:
+        if not is_attempted(user_answer):
             unattempted_count += 1
             is_correct = False
         else:
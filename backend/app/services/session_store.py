@@ -0,0 +1,337 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from app.models import QuizSession
+from app.services.question_set import CompactSession, question_sets
+
+# "memory" (single process) or "sqlite" (shared by all uvicorn workers)
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_DB_PATH = Path(os.getenv("SESSION_DB_PATH", "data/sessions.db"))
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(24 * 3600)))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# SQLite: refresh last-access at most this often per session to keep reads write-free
+TOUCH_INTERVAL_SECONDS = 60
+
+
+class SessionStore(ABC):
+    """
+    Where quiz sessions live between requests.
+
+    Entries expire ``ttl`` seconds after their last access and the least
+    recently used ones are evicted once the stored size exceeds ``max_bytes``.
+    Sessions come back as CompactSession records whose questions are shared
+    with every other session of the same paper.
+    """
+
+    def __init__(self, ttl: int = SESSION_TTL_SECONDS, max_bytes: int = SESSION_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[CompactSession]:
+        ...
+
+    @abstractmethod
+    def put(self, session: CompactSession) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def exists(self, session_id: str) -> bool:
+        """Whether a session is still live, without counting as an access."""
+
+    @abstractmethod
+    def touch(self, session_id: str) -> bool:
+        """Count an access (TTL and LRU position, like get) without loading the session; False if it is gone."""
+
+    @abstractmethod
+    def size(self) -> tuple[int, int]:
+        """(number of sessions, stored bytes)"""
+
+    def shared_by(self, session: CompactSession) -> int:
+        """How many stored sessions share this session's question set (for memory accounting)."""
+        return 1
+
+    def stats(self) -> dict[str, float]:
+        count, stored = self.size()
+        lookups = self.hits + self.misses
+        return {
+            "sessions": count,
+            "bytes": stored,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Per-process LRU store; sessions are kept as live objects.
+
+    A question set counts towards ``max_bytes`` once, however many
+    sessions share it; each session adds only its own small record.
+    """
+
+    def __init__(self, ttl: int = SESSION_TTL_SECONDS, max_bytes: int = SESSION_MAX_BYTES):
+        super().__init__(ttl, max_bytes)
+        # id -> (session, size, expires_at)
+        self._entries: OrderedDict[str, tuple[CompactSession, int, float]] = OrderedDict()
+        # question set digest -> sessions using it
+        self._set_refs: dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[CompactSession]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry[2] < now:
+                if entry is not None:
+                    self._remove(session_id)
+                    self.evictions += 1
+                self.misses += 1
+                return None
+
+            session, size, _ = entry
+            self._entries[session_id] = (session, size, now + self.ttl)
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return session
+
+    def touch(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def put(self, session: CompactSession) -> None:
+        size = session.own_size
+        now = time.monotonic()
+        with self._lock:
+            self._remove(session.id)
+            self._entries[session.id] = (session, size, now + self.ttl)
+            self._bytes += size
+
+            digest = session.question_set.digest
+            if digest not in self._set_refs:
+                self._set_refs[digest] = 0
+                self._bytes += session.question_set.size
+            self._set_refs[digest] += 1
+
+            self._evict(now)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._remove(session_id)
+
+    def exists(self, session_id: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            return entry is not None and entry[2] >= time.monotonic()
+
+    def size(self) -> tuple[int, int]:
+        with self._lock:
+            return len(self._entries), self._bytes
+
+    def shared_by(self, session: CompactSession) -> int:
+        with self._lock:
+            return self._set_refs.get(session.question_set.digest, 0) or 1
+
+    def stats(self) -> dict[str, float]:
+        stats = super().stats()
+        with self._lock:
+            stats["question_sets"] = len(self._set_refs)
+        return stats
+
+    def _remove(self, session_id: str) -> None:
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return
+        session, size, _ = entry
+        self._bytes -= size
+
+        digest = session.question_set.digest
+        self._set_refs[digest] -= 1
+        if not self._set_refs[digest]:
+            del self._set_refs[digest]
+            self._bytes -= session.question_set.size
+
+    def _evict(self, now: float) -> None:
+        # Entries are ordered by last access, so expired ones are always at the front
+        while self._entries:
+            session_id, (_, _, expires_at) = next(iter(self._entries.items()))
+            if self._bytes <= self.max_bytes and expires_at >= now:
+                break
+            self._remove(session_id)
+            self.evictions += 1
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Store shared by every worker process on the host.
+
+    Uses SQLite in WAL mode so readers in one process never block a writer
+    in another; each process keeps its own connection.
+
+    Rows hold the full session JSON plus the digest of its question set;
+    a load whose set is already interned in this process skips reading
+    and parsing the questions.
+    """
+
+    def __init__(
+        self,
+        path: Path = SESSION_DB_PATH,
+        ttl: int = SESSION_TTL_SECONDS,
+        max_bytes: int = SESSION_MAX_BYTES,
+    ):
+        super().__init__(ttl, max_bytes)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_accessed ON sessions (accessed_at)")
+
+    def get(self, session_id: str) -> Optional[CompactSession]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT json_extract(data, '$.question_set'), expires_at, accessed_at FROM sessions WHERE id = ?",
+                (session_id,),
+            ).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                    self.evictions += 1
+                self.misses += 1
+                return None
+
+            if now - row[2] > TOUCH_INTERVAL_SECONDS:
+                self._conn.execute(
+                    "UPDATE sessions SET accessed_at = ?, expires_at = ? WHERE id = ?",
+                    (now, now + self.ttl, session_id),
+                )
+            self.hits += 1
+
+            digest = row[0]
+            question_set = question_sets.get(digest) if digest else None
+            if question_set is None:
+                data = self._conn.execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                if data is None:
+                    return None
+
+        if question_set is None:
+            # Rows written before question sets existed have no digest; it is computed here
+            question_set = question_sets.intern(QuizSession.model_validate_json(data[0]).questions, digest)
+        return CompactSession(session_id, question_set)
+
+    def touch(self, session_id: str) -> bool:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, accessed_at FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None or row[0] < now:
+                self.misses += 1
+                return False
+
+            if now - row[1] > TOUCH_INTERVAL_SECONDS:
+                self._conn.execute(
+                    "UPDATE sessions SET accessed_at = ?, expires_at = ? WHERE id = ?",
+                    (now, now + self.ttl, session_id),
+                )
+            self.hits += 1
+            return True
+
+    def shared_by(self, session: CompactSession) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE json_extract(data, '$.question_set') = ?",
+                (session.question_set.digest,),
+            ).fetchone()
+        return row[0] or 1
+
+    def put(self, session: CompactSession) -> None:
+        # Readable as a plain QuizSession; "question_set" is an extra key
+        data = (
+            f'{{"id": {json.dumps(session.id)}, "question_set": "{session.question_set.digest}", '
+            f'"total_questions": {session.total_questions}, "questions": {session.question_set.to_json()}}}'
+        )
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (session.id, data, len(data), now + self.ttl, now),
+            )
+            self._evict(now)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def exists(self, session_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM sessions WHERE id = ? AND expires_at >= ?", (session_id, time.time())
+            ).fetchone()
+        return row is not None
+
+    def size(self) -> tuple[int, int]:
+        with self._lock:
+            count, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions"
+            ).fetchone()
+        return count, stored
+
+    def _evict(self, now: float) -> None:
+        removed = self._conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,)).rowcount
+        stored = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM sessions").fetchone()[0]
+
+        # Drop least recently accessed sessions until the budget fits
+        while stored > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT id, size FROM sessions ORDER BY accessed_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (row[0],))
+            stored -= row[1]
+            removed += 1
+
+        self.evictions += removed
+
+
+def create_session_store(kind: str = SESSION_STORE) -> SessionStore:
+    if kind == "sqlite":
+        return SQLiteSessionStore()
+    if kind == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"Unknown SESSION_STORE: {kind}")
+
+
+session_store = create_session_store()
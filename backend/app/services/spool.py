@@ -0,0 +1,95 @@
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+# Largest accepted PDF (per file)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Read/write/hash granularity while spooling
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+# Spooled files older than this are leftovers from a crash and get removed
+SPOOL_MAX_AGE_SECONDS = int(os.getenv("SPOOL_MAX_AGE_SECONDS", "3600"))
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an uploaded file exceeds UPLOAD_MAX_BYTES."""
+
+
+@dataclass
+class SpooledUpload:
+    path: Path
+    digest: str  # sha256 of the file content
+    size: int
+
+
+def _write_chunk(out, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+async def spool_upload(
+    upload: UploadFile,
+    dest: Path,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+) -> SpooledUpload:
+    """
+    Stream an upload to ``dest`` in chunks, hashing it on the way.
+
+    Only one chunk is held in memory at a time. Files over ``max_bytes``
+    are rejected as soon as the limit is crossed and nothing is left on disk.
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLargeError(f"{upload.filename} is larger than {max_bytes} bytes")
+
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(dest, "wb") as out:
+            while chunk := await upload.read(SPOOL_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"{upload.filename} is larger than {max_bytes} bytes")
+                await run_in_threadpool(_write_chunk, out, digest, chunk)
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+
+    return SpooledUpload(path=dest, digest=digest.hexdigest(), size=size)
+
+
+def discard(*uploads: SpooledUpload) -> None:
+    """Delete spooled files once they are no longer needed."""
+    for upload in uploads:
+        upload.path.unlink(missing_ok=True)
+
+
+def retain(upload: SpooledUpload, directory: Path) -> SpooledUpload:
+    """Move a spooled file to ``directory``, named by its digest (one copy per content)."""
+    dest = directory / f"{upload.digest}.pdf"
+    if dest.exists():
+        upload.path.unlink(missing_ok=True)
+        os.utime(dest)
+    else:
+        os.replace(upload.path, dest)
+    return SpooledUpload(path=dest, digest=upload.digest, size=upload.size)
+
+
+def cleanup_stale_spool(directory: Path, max_age: int = SPOOL_MAX_AGE_SECONDS) -> int:
+    """Remove spooled PDFs left behind by a crash or restart; returns the count."""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in directory.glob("*.pdf"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
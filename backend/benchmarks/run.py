@@ -0,0 +1,307 @@
+"""
+Benchmarks for the parsing, scoring and HTTP paths.
+
+Run from the backend directory:
+
+    python -m benchmarks.run                   # compare with benchmarks/baseline.json
+    python -m benchmarks.run --save            # record a new baseline
+    python -m benchmarks.run --questions 200 --figure-every 3 --repeat 7
+
+The ``import app.main`` case times a cold start of the API (see
+benchmarks/startup.py); importing one of the heavy, deferred dependencies
+at startup also fails the run. Per-module import times are recorded
+alongside (``imports``) and shown next to the baseline's, but never gated.
+
+Timings are medians over ``--repeat`` runs. A case whose median is more
+than ``--threshold`` slower than the baseline is reported as a regression
+and the exit status is 1. Baselines are machine-specific: record one on
+the machine you compare on.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.startup import measure_startup
+from benchmarks.synthetic import PaperSpec, generate_paper
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+# Slowdowns smaller than this are timer noise, whatever the ratio
+MIN_REGRESSION_MS = 0.5
+# Same for the cold-import case, which runs in a fresh interpreter each time
+MIN_IMPORT_REGRESSION_MS = 100
+
+
+def _isolate(workdir: Path, workers: int) -> None:
+    """Point every store at a scratch directory before the app is imported."""
+    data = workdir / "data"
+    os.environ.update({
+        "HINT_PROVIDER": "fake",
+        "FAKE_HINT_DELAY": "0",
+        "HINT_PREFETCH": "0",
+        "PAGE_WORKERS": str(workers),
+        "SESSION_DB_PATH": str(data / "sessions.db"),
+        "HINT_CACHE_PATH": str(data / "hints.db"),
+        "FIGURE_DB_PATH": str(data / "figures.db"),
+        "STATS_DB_PATH": str(data / "stats.db"),
+        "QUESTION_BANK_PATH": str(data / "questions.db"),
+        "PAPERS_DIR": str(workdir / "uploads" / "papers"),
+    })
+    # Figures are written relative to the working directory
+    os.chdir(workdir)
+
+
+def _time(fn: Callable[[], object], repeat: int, inner: int = 1) -> dict[str, float]:
+    """Median/min per call; fast calls are looped ``inner`` times per sample."""
+    fn()  # warm-up (imports, worker pools, caches)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(inner):
+            fn()
+        samples.append((time.perf_counter() - start) * 1000 / inner)
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3)}
+
+
+def _random_sheets(questions, count: int, seed: int = 7) -> list[list]:
+    from app.models import AnswerSubmission, QuestionType
+
+    rng = random.Random(seed)
+    sheets = []
+    for _ in range(count):
+        answers = []
+        for q in questions:
+            if rng.random() < 0.1:
+                continue
+            if q.question_type == QuestionType.MCQ_SINGLE:
+                answer = rng.choice("ABCD")
+            elif q.question_type == QuestionType.MCQ_MULTIPLE:
+                answer = rng.sample("ABCD", rng.randint(1, 3))
+            else:
+                answer = round(rng.uniform(0, 10), 1)
+            answers.append(AnswerSubmission(question_number=q.number, answer=answer))
+        sheets.append(answers)
+    return sheets
+
+
+def run_benchmarks(spec: PaperSpec, repeat: int, sheets: int, workdir: Path) -> dict[str, dict[str, float]]:
+    import fitz  # PyMuPDF
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.models import AnswerSheet
+    from app.routers.upload import wait_for_bank_writes
+    from app.services.answer_key_parser import extract_answer_key_from_table, extract_answer_key_with_tables
+    from app.services.batch_scorer import score_batch
+    from app.services.figure_extractor import locate_page_figures, render_region, variant_name
+    from app.services.figure_store import ASSETS_DIR
+    from app.services.ingest_cache import ingest_cache
+    from app.services.question_extractor import extract_questions_from_pdf
+    from app.services.scorer import score_quiz
+
+    questions_pdf, answer_key_pdf, pages = generate_paper(spec, workdir / "papers")
+    print(f"Synthetic paper: {spec.questions} questions, {pages} pages")
+
+    results = {}
+
+    def case(name: str, fn: Callable[[], object], inner: int = 1) -> None:
+        results[name] = _time(fn, repeat, inner)
+        print(f"  {name:<36} {results[name]['median_ms']:>10.2f} ms")
+
+    # --- parsing ---
+    answer_key = extract_answer_key_from_table(answer_key_pdf)
+    questions = extract_questions_from_pdf(questions_pdf, answer_key)
+    if len(questions) != spec.questions or len(answer_key) != spec.questions:
+        raise SystemExit(f"Parser mismatch: {len(questions)} questions, {len(answer_key)} keys")
+    # The text fast path must read exactly what table detection reads
+    if answer_key != extract_answer_key_with_tables(answer_key_pdf):
+        raise SystemExit("Answer key mismatch: text fast path differs from table detection")
+
+    case("answer_key", lambda: extract_answer_key_from_table(answer_key_pdf))
+    case("answer_key_tables", lambda: extract_answer_key_with_tables(answer_key_pdf))
+    case("questions", lambda: extract_questions_from_pdf(questions_pdf, answer_key))
+
+    # --- figures: located while parsing, each rendered on its first request ---
+    paper = str(questions_pdf.absolute())
+
+    def locate_figures() -> list:
+        with fitz.open(questions_pdf) as doc:
+            return [f for page in doc for f in locate_page_figures(page, page.get_text("blocks", sort=True), paper)]
+
+    regions = [f.region for f in locate_figures()]
+    if not regions:
+        raise SystemExit("Synthetic paper has no figures (--figure-every 0?)")
+
+    def render_first(variant: str, fmt: str) -> None:
+        # A first request: nothing on disk yet
+        (ASSETS_DIR / variant_name(regions[0].name, variant, fmt)).unlink(missing_ok=True)
+        render_region(regions[0], variant, fmt)
+
+    case("figures_locate", locate_figures)
+    case("figure_render_png", lambda: render_first("full", "png"), inner=5)
+    case("figure_render_webp", lambda: render_first("display", "webp"), inner=5)
+
+    # --- scoring ---
+    answer_sheets = _random_sheets(questions, sheets)
+    batch = [AnswerSheet(answers=answers) for answers in answer_sheets]
+    case("score_quiz", lambda: [score_quiz("bench", questions, answers) for answers in answer_sheets])
+    case("score_batch", lambda: score_batch("bench", questions, batch))
+
+    # --- HTTP routes (in-process) ---
+    with TestClient(app) as client:
+        def upload() -> str:
+            with open(questions_pdf, "rb") as q, open(answer_key_pdf, "rb") as a:
+                job = client.post(
+                    "/api/upload",
+                    files={"questions_pdf": ("q.pdf", q), "answer_key_pdf": ("a.pdf", a)},
+                ).json()
+            while job["status"] not in ("done", "failed"):
+                time.sleep(0.005)
+                job = client.get(f"/api/jobs/{job['job_id']}").json()
+            if job["status"] != "done":
+                raise SystemExit(f"Upload failed: {job['error']}")
+            return job["session_id"]
+
+        def upload_uncached() -> str:
+            ingest_cache.clear()
+            session_id = upload()
+            # Banking runs after the upload completes; keep it out of the other cases
+            wait_for_bank_writes()
+            return session_id
+
+        case("http_upload_parse", upload_uncached)
+        case("http_upload_cached", upload, inner=10)
+
+        session_id = upload()
+        etag = client.get(f"/api/quiz/{session_id}").headers["etag"]
+        submission = {"answers": [a.model_dump() for a in answer_sheets[0]]}
+
+        case("http_get_quiz", lambda: client.get(f"/api/quiz/{session_id}"), inner=20)
+        case("http_get_quiz_304", lambda: client.get(f"/api/quiz/{session_id}", headers={"If-None-Match": etag}), inner=20)
+        case("http_submit", lambda: client.post(f"/api/quiz/{session_id}/submit", json=submission), inner=20)
+        case("http_results", lambda: client.get(f"/api/quiz/{session_id}/results"), inner=20)
+        case("http_stats", lambda: client.get(f"/api/quiz/{session_id}/stats"), inner=20)
+        case("http_bank_quiz", lambda: client.post("/api/bank/quiz", json={"query": "graphs", "limit": 30}), inner=20)
+
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = current["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+        marker = ""
+        floor = MIN_IMPORT_REGRESSION_MS if name.startswith("import ") else MIN_REGRESSION_MS
+        if ratio > 1 + threshold and current["median_ms"] - base["median_ms"] > floor:
+            regressions.append(name)
+            marker = "  << REGRESSION"
+        print(f"  {name:<36} {base['median_ms']:>10.2f} → {current['median_ms']:>10.2f} ms  ({ratio:5.2f}x){marker}")
+    return regressions
+
+
+def compare_imports(modules: dict, baseline: dict, top: int = 10) -> None:
+    """Print the modules whose import time moved most since the baseline (informational)."""
+    base = baseline.get("imports", {})
+    if not base:
+        return
+    moved = sorted(
+        set(modules) | set(base), key=lambda name: abs(modules.get(name, 0.0) - base.get(name, 0.0)), reverse=True,
+    )
+    print("Largest import time changes (not gated):")
+    for name in moved[:top]:
+        print(f"  {name:<36} {base.get(name, 0.0):>10.2f} → {modules.get(name, 0.0):>10.2f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=PaperSpec.questions)
+    parser.add_argument("--mix", default="2,1,1", help="relative MCQ,MSQ,NAT weights")
+    parser.add_argument("--figure-every", type=int, default=PaperSpec.figure_every)
+    parser.add_argument("--filler-lines", type=int, default=PaperSpec.filler_lines)
+    parser.add_argument("--sheets", type=int, default=500, help="answer sheets for the scoring cases")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1, help="page workers (1 = serial, most stable)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", type=Path, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    spec = PaperSpec(
+        questions=args.questions,
+        mix=tuple(int(w) for w in args.mix.split(",")),
+        figure_every=args.figure_every,
+        filler_lines=args.filler_lines,
+    )
+    baseline_path = args.baseline.absolute()
+    output_path = args.output.absolute() if args.output else None
+
+    workdir = Path(tempfile.mkdtemp(prefix="gate-bench-"))
+    _isolate(workdir, args.workers)
+
+    # Before anything imports the app in this process
+    startup, modules, eager = measure_startup(args.repeat)
+    print("Startup imports:")
+    for name, timing in startup.items():
+        print(f"  {name:<36} {timing['median_ms']:>10.2f} ms")
+    for name, ms in list(modules.items())[:10]:
+        print(f"    {name:<34} {ms:>10.2f} ms")
+    if eager:
+        print(f"Imported at startup but should load on first use: {', '.join(eager)}")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "workers": args.workers,
+            "sheets": args.sheets,
+            "spec": asdict(spec),
+        },
+        "results": {**startup, **run_benchmarks(spec, args.repeat, args.sheets, workdir)},
+        "imports": modules,
+    }
+
+    if output_path:
+        output_path.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.save:
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {baseline_path}")
+        return 1 if eager else 0
+
+    if not baseline_path.exists():
+        print("No baseline yet; run with --save to record one")
+        return 1 if eager else 0
+
+    baseline = json.loads(baseline_path.read_text())
+    base_meta = {k: v for k, v in baseline.get("meta", {}).items() if k not in ("python", "platform")}
+    this_meta = json.loads(json.dumps({k: v for k, v in report["meta"].items() if k not in ("python", "platform")}))
+    if base_meta != this_meta:
+        print("Warning: baseline was recorded with different settings; comparison is indicative only")
+
+    print(f"Compared with {baseline_path.name} (threshold {args.threshold:.0%}):")
+    regressions = compare(report["results"], baseline, args.threshold) + eager
+    compare_imports(modules, baseline)
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Cold-start cost of the API: how long ``import app.main`` takes in a fresh
+interpreter (``python -X importtime``), where that time goes, and which
+heavy dependencies it pulls in.
+"""
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Heavy dependencies that must load on first use, never at startup
+DEFERRED_MODULES = ("google.genai", "fitz", "pdfplumber", "numpy", "PIL.Image")
+
+# Modules faster than this (cumulative) are left out of the recorded breakdown
+IMPORT_DETAIL_MIN_MS = 1.0
+
+
+def import_times(module: str = "app.main") -> dict[str, float]:
+    """Cumulative import time (ms) of every module loaded by importing ``module``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env={**os.environ, "PYTHONPATH": str(BACKEND_DIR)},
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def measure_startup(repeat: int) -> tuple[dict[str, dict[str, float]], dict[str, float], list[str]]:
+    """
+    The ``import app.main`` benchmark case, the median cumulative import
+    time of every module above IMPORT_DETAIL_MIN_MS (slowest first), and
+    the deferred modules that were imported eagerly anyway.
+
+    Per-module times of a few ms are mostly noise, so only the whole
+    import is a case; the breakdown is recorded to see where a slower
+    start comes from, not compared.
+    """
+    samples = [import_times() for _ in range(repeat)]
+
+    times = [s["app.main"] for s in samples]
+    results = {"import app.main": {"median_ms": round(statistics.median(times), 3), "min_ms": round(min(times), 3)}}
+
+    modules = {}
+    for name in set().union(*samples):
+        # A module missing from a sample was not imported by it: counts as 0
+        median = statistics.median(s.get(name, 0.0) for s in samples)
+        if median >= IMPORT_DETAIL_MIN_MS and name != "app.main":
+            modules[name] = round(median, 3)
+    modules = dict(sorted(modules.items(), key=lambda item: item[1], reverse=True))
+
+    eager = [m for m in DEFERRED_MODULES if any(m in s for s in samples)]
+    return results, modules, eager
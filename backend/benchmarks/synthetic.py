@@ -0,0 +1,122 @@
+"""
+Synthetic GATE-style papers for benchmarking.
+
+Generates a question paper (running header/footer, "Q.<n>" markers,
+(A)-(D) options, drawn figures, questions spilling over page breaks) and
+a matching answer-key table in the layout the parsers expect.
+"""
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+PAGE_BOTTOM = 790
+ANSWER_KEY_COLUMNS = ["Q. No.", "Session", "Q. Type", "Section", "Key/Range", "Mark"]
+COLUMN_X = [40, 100, 160, 220, 290, 420, 480]
+ROW_HEIGHT = 18
+
+
+@dataclass
+class PaperSpec:
+    questions: int = 65
+    mix: tuple[int, int, int] = (2, 1, 1)  # relative weights of MCQ, MSQ, NAT
+    figure_every: int = 5  # every n-th question gets a drawn figure (0 = none)
+    filler_lines: int = 1  # extra statement lines per question (controls page count)
+    cover_pages: int = 0  # instruction pages (without header/footer) before the first question
+    seed: int = 1
+
+
+def _question_types(spec: PaperSpec) -> list[str]:
+    rng = random.Random(spec.seed)
+    return rng.choices(["MCQ", "MSQ", "NAT"], weights=spec.mix, k=spec.questions)
+
+
+def answer_key_value(kind: str, number: int) -> str:
+    """The Key/Range cell of question ``number`` in the synthetic answer key."""
+    if kind == "MCQ":
+        return "ABCD"[number % 4]
+    if kind == "MSQ":
+        return ";".join(sorted({"ABCD"[number % 4], "ABCD"[(number + 2) % 4]}))
+    return f"{number % 7}.5 to {number % 7}.7" if number % 2 else f"{number} to {number}"
+
+
+def write_question_paper(spec: PaperSpec, kinds: list[str], path: Path) -> int:
+    doc = fitz.open()
+    page = None
+    y = PAGE_BOTTOM
+
+    for number in range(1, spec.cover_pages + 1):
+        cover = doc.new_page()
+        cover.insert_text((50, 60), f"General instructions, page {number}", fontsize=12)
+        for i in range(10):
+            cover.insert_text((50, 90 + 16 * i), f"{i + 1}. Read instruction {i + 1} carefully before you start.", fontsize=10)
+
+    def line(x: float, text: str, height: float = 14) -> None:
+        nonlocal page, y
+        if page is None or y + height > PAGE_BOTTOM:
+            page = doc.new_page()
+            y = 60
+            page.insert_text((50, 40), "GATE 2024 Computer Science and Information Technology", fontsize=9)
+            page.insert_text((250, 820), f"CS {len(doc)} / 99", fontsize=8)
+        page.insert_text((x, y), text, fontsize=10)
+        y += height
+
+    for number, kind in enumerate(kinds, start=1):
+        line(50, f"Q.{number} Consider the following statement number {number} about graphs.")
+        for i in range(spec.filler_lines):
+            line(50, f"Assume the structure in part {i + 1} has {number * (i + 3)} vertices and is connected.")
+        line(50, f"Which of the following is true for instance {number}?", 18)
+
+        if spec.figure_every and number % spec.figure_every == 0 and y + 70 < PAGE_BOTTOM:
+            page.draw_rect(fitz.Rect(100, y, 250, y + 60), color=(0, 0, 0))
+            page.draw_line((100, y), (250, y + 60))
+            page.draw_circle((200, y + 20), 12, color=(0, 0, 0))
+            y += 70
+
+        if kind != "NAT":
+            for letter in "ABCD":
+                line(60, f"({letter}) option {letter.lower()} for question {number}")
+        y += 12
+
+    doc.save(path)
+    pages = len(doc)
+    doc.close()
+    return pages
+
+
+def write_answer_key(kinds: list[str], path: Path) -> None:
+    doc = fitz.open()
+    page = doc.new_page()
+    y = 40
+
+    def row(values: list) -> None:
+        nonlocal y
+        for i, value in enumerate(values):
+            page.insert_text((COLUMN_X[i] + 3, y + 13), str(value), fontsize=9)
+        for x in COLUMN_X:
+            page.draw_line((x, y), (x, y + ROW_HEIGHT))
+        page.draw_line((COLUMN_X[0], y), (COLUMN_X[-1], y))
+        page.draw_line((COLUMN_X[0], y + ROW_HEIGHT), (COLUMN_X[-1], y + ROW_HEIGHT))
+        y += ROW_HEIGHT
+
+    row(ANSWER_KEY_COLUMNS)
+    for number, kind in enumerate(kinds, start=1):
+        if y > PAGE_BOTTOM - ROW_HEIGHT:
+            page = doc.new_page()
+            y = 40
+        row([number, 1, kind, "CS", answer_key_value(kind, number), 1])
+
+    doc.save(path)
+    doc.close()
+
+
+def generate_paper(spec: PaperSpec, directory: Path) -> tuple[Path, Path, int]:
+    """Write questions.pdf and answer_key.pdf into ``directory``; returns (questions, key, pages)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    kinds = _question_types(spec)
+    questions_path = directory / "questions.pdf"
+    answer_key_path = directory / "answer_key.pdf"
+    pages = write_question_paper(spec, kinds, questions_path)
+    write_answer_key(kinds, answer_key_path)
+    return questions_path, answer_key_path, pages
@@ -0,0 +1,17 @@
+import os
+import tempfile
+from pathlib import Path
+
+# Every store points at a scratch directory before the app is imported
+_data = Path(tempfile.mkdtemp(prefix="gate-quiz-tests-"))
+os.environ.update({
+    "HINT_PROVIDER": "fake",
+    "FAKE_HINT_DELAY": "0",
+    "HINT_PREFETCH": "0",
+    "SESSION_DB_PATH": str(_data / "sessions.db"),
+    "HINT_CACHE_PATH": str(_data / "hints.db"),
+    "FIGURE_DB_PATH": str(_data / "figures.db"),
+    "STATS_DB_PATH": str(_data / "stats.db"),
+    "QUESTION_BANK_PATH": str(_data / "questions.db"),
+    "PAPERS_DIR": str(_data / "papers"),
+})
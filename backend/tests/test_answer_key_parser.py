@@ -0,0 +1,113 @@
+import fitz
+import pytest
+
+from app.services.answer_key_parser import (
+    IrregularLayoutError,
+    extract_answer_key_from_table,
+    extract_answer_key_from_text,
+    extract_answer_key_with_tables,
+)
+from benchmarks.synthetic import ANSWER_KEY_COLUMNS, PAGE_BOTTOM, ROW_HEIGHT, answer_key_value
+
+QUESTIONS = 65
+KINDS = ["MCQ", "MSQ", "NAT", "MCQ", "NAT"]
+COLUMN_WIDTHS = [60, 60, 60, 70, 130, 60]
+
+
+def _kind(number: int) -> str:
+    return KINDS[number % len(KINDS)]
+
+
+def write_answer_key(path, shift=None, wrap=False, tables=1):
+    """
+    An answer key table over several pages.
+
+    ``shift(page_index)`` moves a page's columns right (pt); ``wrap`` breaks
+    NAT ranges onto a second line; ``tables`` splits the questions into
+    that many tables, each with its own header, stacked on the pages.
+    """
+    doc = fitz.open()
+    state = {"page": None, "y": PAGE_BOTTOM, "x": [], "widths": COLUMN_WIDTHS}
+
+    def new_page():
+        state["page"] = doc.new_page()
+        state["y"] = 40
+        left = 40 + (shift(len(doc) - 1) if shift else 0)
+        state["x"] = [left + sum(COLUMN_WIDTHS[:i]) for i in range(len(COLUMN_WIDTHS) + 1)]
+
+    def row(values, lines=1):
+        height = ROW_HEIGHT * lines
+        if state["y"] + height > PAGE_BOTTOM:
+            new_page()
+        page, y, xs = state["page"], state["y"], state["x"]
+        for x, value in zip(xs, values):
+            for i, text in enumerate(str(value).split("\n")):
+                page.insert_text((x + 3, y + 13 + i * ROW_HEIGHT), text, fontsize=9)
+        for x in xs:
+            page.draw_line((x, y), (x, y + height))
+        page.draw_line((xs[0], y), (xs[-1], y))
+        page.draw_line((xs[0], y + height), (xs[-1], y + height))
+        state["y"] += height
+
+    per_table = -(-QUESTIONS // tables)
+    for number in range(1, QUESTIONS + 1):
+        if (number - 1) % per_table == 0:
+            if state["page"] is not None:
+                state["y"] += 30  # gap between stacked tables
+            row(ANSWER_KEY_COLUMNS)
+        kind = _kind(number)
+        key = answer_key_value(kind, number)
+        if wrap and kind == "NAT" and " to " in key:
+            row([number, 1, kind, "CS", key.replace(" to ", " to\n"), 1], lines=2)
+        else:
+            row([number, 1, kind, "CS", key, 1])
+
+    doc.save(path)
+    doc.close()
+    return path
+
+
+LAYOUTS = {
+    "regular": {},
+    "wrapped_rows": {"wrap": True},
+    "shifted_continuation": {"shift": lambda page: 45 if page else 0},
+    "multiple_tables": {"tables": 3},
+}
+
+
+@pytest.fixture(params=sorted(LAYOUTS))
+def answer_key_pdf(request, tmp_path):
+    return request.param, write_answer_key(tmp_path / f"{request.param}.pdf", **LAYOUTS[request.param])
+
+
+def test_answer_key_matches_table_detection(answer_key_pdf):
+    _, path = answer_key_pdf
+    tables = extract_answer_key_with_tables(path, workers=1)
+
+    assert sorted(tables) == list(range(1, QUESTIONS + 1))
+    assert extract_answer_key_from_table(path, workers=1) == tables
+
+
+def test_text_path_reads_regular_layouts_or_refuses(answer_key_pdf):
+    layout, path = answer_key_pdf
+    if layout in ("regular", "multiple_tables"):
+        assert extract_answer_key_from_text(path) == extract_answer_key_with_tables(path, workers=1)
+    else:
+        with pytest.raises(IrregularLayoutError):
+            extract_answer_key_from_text(path)
+
+
+def test_table_fallback_reports_its_own_stage(answer_key_pdf):
+    layout, path = answer_key_pdf
+    stages = {"text": [], "tables": []}
+    extract_answer_key_from_table(
+        path,
+        on_page=lambda done, total: stages["text"].append(done),
+        workers=1,
+        on_table_page=lambda done, total: stages["tables"].append(done),
+    )
+
+    # Neither count goes backwards; only irregular layouts run table detection
+    for counts in stages.values():
+        assert counts == sorted(counts)
+    assert bool(stages["tables"]) == (layout not in ("regular", "multiple_tables"))
@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from app.models import AnswerSheet, AnswerSubmission, Question, QuestionType
+from app.services.batch_scorer import PYTHON, compile_answer_key, score_batch
+from app.services.scorer import score_quiz
+
+LETTERS = "ABCD"
+
+# Answers no key matches: malformed NAT input, blanks, non-letters
+MALFORMED = ["", "   ", "abc", "1.2.3", "nan", "--5", "E", "AB", "1e400x"]
+
+
+def _question(number: int, kind: str, rng: random.Random) -> Question:
+    if kind == "MCQ":
+        qtype, answer = QuestionType.MCQ_SINGLE, rng.choice(LETTERS + LETTERS.lower())
+    elif kind == "MSQ":
+        qtype, answer = QuestionType.MCQ_MULTIPLE, rng.sample(LETTERS, rng.randint(1, 3))
+    elif kind == "NAT_INT":
+        qtype, answer = QuestionType.NAT_INTEGER, rng.randint(-50, 50)
+    elif kind == "NAT_TOL":
+        # 0.0 ± NAT_DECIMAL_TOLERANCE is exact in floats: answers land on the boundary
+        qtype, answer = QuestionType.NAT_DECIMAL, rng.choice([0.0, round(rng.uniform(-10, 10), 2)])
+    elif kind == "NAT_RANGE":
+        lo = round(rng.uniform(0, 10), 1)
+        qtype, answer = QuestionType.NAT_DECIMAL, (lo, round(lo + rng.uniform(0, 0.5), 2))
+    else:
+        # Keys the arrays can't represent: scored cell by cell with score_answer
+        qtype, answer = rng.choice([
+            (QuestionType.MCQ_SINGLE, "a1"),
+            (QuestionType.MCQ_MULTIPLE, ["A", "a"]),
+            (QuestionType.NAT_INTEGER, 2 ** 70),
+            (QuestionType.NAT_DECIMAL, (2 ** 60 + 1, 2 ** 61)),
+        ])
+    options = {letter: f"option {letter}" for letter in LETTERS} if kind in ("MCQ", "MSQ") else None
+    return Question(number=number, text=f"Q{number}", question_type=qtype, options=options, correct_answer=answer)
+
+
+def _answer(question: Question, rng: random.Random):
+    roll = rng.random()
+    if roll < 0.15:
+        return None  # unattempted
+    if roll < 0.3:
+        return rng.choice(MALFORMED + [[], [""], ["A", "A"], ["a", "B"], ["1"]])
+
+    correct = question.correct_answer
+    if question.question_type == QuestionType.MCQ_SINGLE:
+        return rng.choice([correct, str(correct).swapcase(), rng.choice(LETTERS), [rng.choice(LETTERS)]])
+    if question.question_type == QuestionType.MCQ_MULTIPLE:
+        choices = correct if isinstance(correct, list) else [correct]
+        return rng.choice([list(choices), [c.lower() for c in reversed(choices)], rng.sample(LETTERS, 2), choices[0]])
+    if isinstance(correct, tuple):
+        lo, hi = correct
+        return rng.choice([lo, hi, (lo + hi) / 2, lo - 0.01, hi + 0.01, str(hi), float(hi) * 1.5])
+    value = float(correct)
+    return rng.choice([
+        correct, value + rng.choice([-0.011, -0.01, -0.009, 0.004, 0.01, 0.5, 1]), str(correct), f" {correct} ",
+        -value, 1e30,
+    ])
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_batch_matches_score_quiz(seed):
+    rng = random.Random(seed)
+    kinds = ["MCQ", "MSQ", "NAT_INT", "NAT_TOL", "NAT_RANGE", "PYTHON"]
+    questions = [_question(n, rng.choice(kinds), rng) for n in range(1, 41)]
+    # Both paths are exercised: vectorized columns and score_answer ones
+    assert PYTHON in compile_answer_key(questions).kind.tolist()
+
+    sheets = []
+    for _ in range(500):
+        answers = [
+            AnswerSubmission(question_number=q.number, answer=answer)
+            for q in questions
+            if (answer := _answer(q, rng)) is not None or rng.random() < 0.5
+        ]
+        sheets.append(AnswerSheet(answers=answers))
+
+    batch = score_batch("s", questions, sheets, include_results=True)
+
+    for sheet, scored in zip(sheets, batch.sheets):
+        expected = score_quiz("s", questions, sheet.answers)
+        assert scored.is_correct == [r.is_correct for r in expected.results]
+        assert (scored.attempted, scored.correct, scored.incorrect, scored.unattempted) == (
+            expected.attempted, expected.correct, expected.incorrect, expected.unattempted,
+        )
+        assert scored.score_percentage == expected.score_percentage
@@ -0,0 +1,39 @@
+import time
+
+from app.services.figure_store import REF_OWNER_TIMEOUT_SECONDS, FigureRefs
+
+
+def test_workers_only_release_their_own_sessions(tmp_path):
+    path = tmp_path / "figures.db"
+    first, second = FigureRefs(path, owner="first"), FigureRefs(path, owner="second")
+    first.add("s1", ["fig_a.png"])
+    second.add("s2", ["fig_b.png"])
+
+    # The second worker's memory store doesn't know s1; that doesn't make it dead
+    second.release_orphans()
+    second.release([sid for sid in second.session_ids() if sid != "s2"])
+
+    assert second.session_ids() == ["s2"]
+    assert second.referenced() == {"fig_a.png", "fig_b.png"}
+
+
+def test_references_of_a_stopped_worker_are_released(tmp_path):
+    path = tmp_path / "figures.db"
+    stopped, live = FigureRefs(path, owner="stopped"), FigureRefs(path, owner="live")
+    stopped.add("s1", ["fig_a.png"])
+    live.add("s2", ["fig_b.png"])
+    stopped._db().execute(
+        "UPDATE figure_ref_owners SET seen_at = ? WHERE owner = 'stopped'",
+        (time.time() - REF_OWNER_TIMEOUT_SECONDS - 1,),
+    )
+
+    assert live.release_orphans() == 1
+    assert live.referenced() == {"fig_b.png"}
+
+
+def test_shared_store_references_have_no_owner(tmp_path):
+    refs = FigureRefs(tmp_path / "figures.db", owner="")
+    refs.add("s1", ["fig_a.png"])
+
+    assert refs.release_orphans() == 0
+    assert refs.session_ids() == ["s1"]
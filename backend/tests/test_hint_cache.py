@@ -0,0 +1,26 @@
+from app.services.hint_cache import HintCache
+
+
+def test_aliased_keys_share_the_target_hint(tmp_path):
+    cache = HintCache(tmp_path / "hints.db")
+    cache.put("canonical", "shared hint")
+    cache.put("own", "own hint")
+    assert cache.alias([("copy", "canonical"), ("own", "canonical"), ("canonical", "canonical")]) == 2
+
+    assert cache.get("copy") == "shared hint"
+    # A hint of its own wins over the alias
+    assert cache.get("own") == "own hint"
+    assert cache.get_many(["copy", "own", "canonical", "other"]) == {
+        "copy": "shared hint", "own": "own hint", "canonical": "shared hint",
+    }
+    assert cache.resolve("copy") == "canonical"
+    assert cache.resolve("other") == "other"
+
+
+def test_alias_of_a_missing_hint_is_generated_under_the_target(tmp_path):
+    cache = HintCache(tmp_path / "hints.db")
+    cache.alias([("copy", "canonical")])
+    assert cache.get("copy") is None
+
+    cache.put(cache.resolve("copy"), "generated once")
+    assert cache.get("canonical") == cache.get("copy") == "generated once"
@@ -0,0 +1,22 @@
+from app.services.answer_key_parser import extract_answer_key_from_table
+from app.services.ingest import ingest_papers
+from app.services.pdf_document import process_document
+from app.services.question_extractor import parse_questions
+from benchmarks.synthetic import PaperSpec, generate_paper
+
+
+def test_streamed_upload_matches_batch_parse(tmp_path):
+    # Running headers/footers only start after the pages streaming learns them from
+    questions_path, answer_key_path, _ = generate_paper(
+        PaperSpec(questions=90, figure_every=3, cover_pages=3), tmp_path
+    )
+    streamed = []
+
+    result = ingest_papers(questions_path, answer_key_path, emit=streamed.append)
+
+    answer_key = extract_answer_key_from_table(answer_key_path)
+    expected = parse_questions(process_document(questions_path, workers=1), answer_key)
+    assert len(expected) == 90
+    assert not any("GATE 2024" in q.text for q in expected)
+    assert result.questions == expected
+    assert {q.number for q in streamed} == {q.number for q in expected}
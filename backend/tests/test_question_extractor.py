@@ -0,0 +1,72 @@
+import pytest
+
+from app.services import page_pool
+from app.services.pdf_document import PageContent, iter_document_pages, process_document
+from app.services.question_extractor import _page_furniture, _strip_furniture, iter_questions, parse_questions
+from benchmarks.synthetic import PaperSpec, generate_paper
+
+
+@pytest.fixture(scope="module")
+def paper(tmp_path_factory):
+    questions_path, _, pages = generate_paper(
+        PaperSpec(questions=90, figure_every=4), tmp_path_factory.mktemp("paper")
+    )
+    assert pages >= page_pool.MIN_PARALLEL_PAGES
+    yield questions_path
+    if page_pool._pool is not None:
+        page_pool._pool.shutdown()
+
+
+def test_parallel_extraction_matches_serial(paper):
+    serial = process_document(paper, workers=1)
+    parallel = process_document(paper, workers=2)
+
+    assert parallel.pages == serial.pages
+    assert parse_questions(parallel, {}) == parse_questions(serial, {})
+
+
+def test_streamed_extraction_matches_serial(paper):
+    # The path uploads take: pages streamed from the worker pool, questions yielded as they complete
+    serial = process_document(paper, workers=1)
+    pages = []
+
+    def read_pages():
+        for page in iter_document_pages(paper, workers=2):
+            pages.append(page)
+            yield page
+
+    streamed = list(iter_questions(read_pages(), {}))
+
+    assert pages == serial.pages
+    assert sorted(streamed, key=lambda q: q.number) == parse_questions(serial, {})
+
+
+def test_running_header_and_footer_are_stripped(paper):
+    questions = parse_questions(process_document(paper, workers=1), {})
+
+    assert len(questions) == 90
+    for q in questions:
+        assert "GATE 2024" not in q.text
+        assert "/ 99" not in q.text and not any("/ 99" in o for o in (q.options or {}).values())
+
+
+def _page(number: int, body: str) -> PageContent:
+    return PageContent(number=number, text=f"\nGATE 2024 CS\n{body}\nCS {number} / 4\n")
+
+
+def test_repeated_question_stem_is_kept():
+    stem = "Which one of the following is CORRECT?"
+    pages = [_page(n, f"{stem}\nQ.{n} Some question {n}\n(A) a\n(B) b\n{stem}") for n in range(1, 5)]
+    furniture = _page_furniture(pages)
+
+    assert furniture.top == {"GATE # CS"}
+    assert furniture.bottom == {"CS # / #"}
+    text = _strip_furniture(pages[0].text, furniture)
+    assert text.strip().startswith(stem) and text.strip().endswith(stem)
+
+
+def test_short_papers_are_not_stripped():
+    pages = [_page(n, f"Q.{n} Question {n}") for n in range(1, 3)]
+    furniture = _page_furniture(pages)
+
+    assert not furniture.top and not furniture.bottom
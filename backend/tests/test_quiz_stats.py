@@ -0,0 +1,61 @@
+import time
+
+from app.models import AnswerSubmission, Question, QuestionType
+from app.services.quiz_stats import STATS_SLOT_TIMEOUT_SECONDS, QuizStats
+from app.services.scorer import score_quiz
+
+QUESTIONS = [Question(number=1, text="Q1", question_type=QuestionType.NAT_INTEGER, correct_answer=4)]
+
+
+def _result(answer):
+    return score_quiz("s1", QUESTIONS, [AnswerSubmission(question_number=1, answer=answer)])
+
+
+def _expire_slots(stats: QuizStats) -> None:
+    stats._conn.execute("UPDATE stats_slots SET seen_at = ?", (time.time() - STATS_SLOT_TIMEOUT_SECONDS - 1,))
+
+
+def _rows(stats: QuizStats) -> int:
+    return stats._conn.execute("SELECT COUNT(*) FROM session_stats WHERE session_id = 's1'").fetchone()[0]
+
+
+def test_restarted_worker_continues_its_slot(tmp_path):
+    path = tmp_path / "stats.db"
+    for answer in (4, 5, 4):
+        stats = QuizStats(path)  # a fresh process each time
+        stats.record("s1", _result(answer))
+        _expire_slots(stats)
+
+    total = stats.get("s1")
+    assert _rows(stats) == 1
+    assert total.submissions == 3
+    assert total.questions[1].correct == 2
+
+
+def test_live_workers_keep_separate_rows(tmp_path):
+    path = tmp_path / "stats.db"
+    first, second = QuizStats(path), QuizStats(path)
+    first.record("s1", _result(4))
+    second.record("s1", _result(5))
+
+    assert first.worker != second.worker
+    assert _rows(first) == 2
+    assert first.get("s1").submissions == 2
+
+
+def test_idle_worker_moves_off_a_taken_slot(tmp_path):
+    path = tmp_path / "stats.db"
+    idle = QuizStats(path)
+    idle.record("s1", _result(4))
+    _expire_slots(idle)
+
+    newcomer = QuizStats(path)
+    newcomer.record("s1", _result(4))
+    assert newcomer.worker == "0"
+
+    # The idle worker's slot was taken over: it must not overwrite the newcomer's row
+    idle.record("s1", _result(5))
+    assert idle.worker == "1"
+    total = idle.get("s1")
+    assert total.submissions == 3
+    assert total.questions[1].correct == 2
@@ -7,6 +7,12 @@ import { Badge } from './ui/Badge'
 import { CheckCircle, XCircle } from 'lucide-react'
 import { cn } from '@/lib/utils'
 
+const ASSET_HOST = 'http://localhost:8000'
+
+// srcset URLs from the API are host-relative
+const withHost = (srcset: string) =>
+  srcset.split(', ').map((entry) => `${ASSET_HOST}${entry}`).join(', ')
+
 interface QuestionCardProps {
   question: Question
   answer: string | string[] | number | null
@@ -98,13 +104,34 @@ export function QuestionCard({
           </p>
         </div>
 
-        {question.images && question.images.length > 0 && (
+        {question.figures && question.figures.length > 0 ? (
+          <div className="space-y-4">
+            {question.figures.map((fig, idx) => (
+              <div key={idx} className="flex justify-center">
+                <picture>
+                  <source type="image/webp" srcSet={withHost(fig.srcset)} sizes={`(max-width: 768px) 100vw, ${fig.width}px`} />
+                  <img
+                    src={`${ASSET_HOST}${fig.src}`}
+                    srcSet={withHost(fig.fallback_srcset)}
+                    sizes={`(max-width: 768px) 100vw, ${fig.width}px`}
+                    width={fig.width}
+                    height={fig.height}
+                    alt={`Figure ${idx + 1}`}
+                    loading="lazy"
+                    className="max-w-full h-auto rounded-xl border border-border shadow-lg"
+                  />
+                </picture>
+              </div>
+            ))}
+          </div>
+        ) : question.images && question.images.length > 0 && (
           <div className="space-y-4">
             {question.images.map((img, idx) => (
               <div key={idx} className="flex justify-center">
                 <img
                   src={`http://localhost:8000${img}`}
                   alt={`Figure ${idx + 1}`}
+                  loading="lazy"
                   className="max-w-full rounded-xl border border-border shadow-lg"
                 />
               </div>
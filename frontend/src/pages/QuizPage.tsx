@@ -10,7 +10,7 @@ import {
   useCurrentQuestion,
   useQuizProgress,
 } from '../store/quizStore'
-import { getQuiz, submitQuiz } from '../services/api'
+import { getQuiz, getSessionHints, submitQuiz } from '../services/api'
 import { cn } from '@/lib/utils'
 
 export function QuizPage() {
@@ -18,10 +18,12 @@ export function QuizPage() {
   const navigate = useNavigate()
 
   const {
+    sessionId: loadedSessionId,
     questions,
     answers,
     currentQuestionIndex,
     setSession,
+    setHints,
     setAnswer,
     nextQuestion,
     prevQuestion,
@@ -62,6 +64,19 @@ export function QuizPage() {
     loadQuiz()
   }, [sessionId, questions.length, setSession, setLoading, setError])
 
+  // Hints already generated for this paper show up without another request each
+  useEffect(() => {
+    if (!loadedSessionId) return
+
+    getSessionHints(loadedSessionId)
+      .then((response) => {
+        setHints(Object.fromEntries(response.hints.map((h) => [h.question_number, h.hint])))
+      })
+      .catch(() => {
+        // Optional: hints can still be requested one by one
+      })
+  }, [loadedSessionId, setHints])
+
   const handleSubmit = async () => {
     if (!sessionId) return
 
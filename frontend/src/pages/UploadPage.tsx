@@ -4,7 +4,7 @@ import { FileUp, Loader2, BookOpen, CheckCircle, Zap, Brain } from 'lucide-react
 import { FileUpload } from '../components/FileUpload'
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from '../components/ui/Card'
 import { Button } from '../components/ui/Button'
-import { uploadPDFs, getQuiz } from '../services/api'
+import { uploadPDFs, waitForJob, getQuiz } from '../services/api'
 import { useQuizStore } from '../store/quizStore'
 import { cn } from '@/lib/utils'
 
@@ -14,6 +14,7 @@ export function UploadPage() {
 
   const [questionsPdf, setQuestionsPdf] = useState<File | null>(null)
   const [answerKeyPdf, setAnswerKeyPdf] = useState<File | null>(null)
+  const [progress, setProgress] = useState<string | null>(null)
 
   const handleUpload = async () => {
     if (!questionsPdf || !answerKeyPdf) {
@@ -25,8 +26,17 @@ export function UploadPage() {
     setError(null)
 
     try {
-      const uploadResponse = await uploadPDFs(questionsPdf, answerKeyPdf)
-      const quizData = await getQuiz(uploadResponse.session_id)
+      const queued = await uploadPDFs(questionsPdf, answerKeyPdf)
+      const job = await waitForJob(queued, (j) => {
+        if (j.stage && j.pages_total > 0) {
+          const what =
+            j.stage === 'answer_key' ? 'answer key'
+              : j.stage === 'answer_key_tables' ? 'answer key tables'
+                : 'questions'
+          setProgress(`Parsing ${what}: page ${j.pages_done} of ${j.pages_total}`)
+        }
+      })
+      const quizData = await getQuiz(job.session_id!)
       setSession(quizData.id, quizData.questions)
       navigate(`/quiz/${quizData.id}`)
     } catch (err: unknown) {
@@ -38,6 +48,7 @@ export function UploadPage() {
       )
     } finally {
       setLoading(false)
+      setProgress(null)
     }
   }
 
@@ -96,7 +107,7 @@ export function UploadPage() {
             loading={isLoading}
           >
             {!isLoading && <Zap className="w-5 h-5 mr-2" />}
-            {isLoading ? 'Processing...' : 'Generate Quiz'}
+            {isLoading ? progress || 'Processing...' : 'Generate Quiz'}
           </Button>
         </CardContent>
       </Card>
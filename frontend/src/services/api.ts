@@ -1,5 +1,12 @@
 import axios from 'axios';
-import { QuizSession, UploadResponse, QuizSubmission, QuizResult, HintResponse } from '../types';
+import {
+  QuizSession,
+  JobResponse,
+  QuizSubmission,
+  QuizResult,
+  HintResponse,
+  SessionHintsResponse,
+} from '../types';
 
 const API_BASE_URL = 'http://localhost:8000/api';
 
@@ -13,12 +20,12 @@ const api = axios.create({
 export async function uploadPDFs(
   questionsPdf: File,
   answerKeyPdf: File
-): Promise<UploadResponse> {
+): Promise<JobResponse> {
   const formData = new FormData();
   formData.append('questions_pdf', questionsPdf);
   formData.append('answer_key_pdf', answerKeyPdf);
 
-  const response = await api.post<UploadResponse>('/upload', formData, {
+  const response = await api.post<JobResponse>('/upload', formData, {
     headers: {
       'Content-Type': 'multipart/form-data',
     },
@@ -27,6 +34,29 @@ export async function uploadPDFs(
   return response.data;
 }
 
+export async function getJob(jobId: string): Promise<JobResponse> {
+  const response = await api.get<JobResponse>(`/jobs/${jobId}`);
+  return response.data;
+}
+
+export async function waitForJob(
+  job: JobResponse,
+  onProgress?: (job: JobResponse) => void,
+  intervalMs = 500
+): Promise<JobResponse> {
+  while (job.status === 'queued' || job.status === 'running') {
+    onProgress?.(job);
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    job = await getJob(job.job_id);
+  }
+
+  if (job.status === 'failed' || !job.session_id) {
+    throw new Error(job.error || 'Failed to process PDFs');
+  }
+
+  return job;
+}
+
 export async function getQuiz(sessionId: string): Promise<QuizSession> {
   const response = await api.get<QuizSession>(`/quiz/${sessionId}`);
   return response.data;
@@ -53,4 +83,13 @@ export async function getHint(
   return response.data;
 }
 
+export async function getSessionHints(
+  sessionId: string
+): Promise<SessionHintsResponse> {
+  const response = await api.get<SessionHintsResponse>(
+    `/quiz/${sessionId}/hints`
+  );
+  return response.data;
+}
+
 export { api };
@@ -26,6 +26,7 @@ interface QuizState {
   reset: () => void;
   getAnswersForSubmission: () => { question_number: number; answer: UserAnswer }[];
   setHint: (questionNumber: number, hint: string) => void;
+  setHints: (hints: Record<number, string>) => void;
   setHintLoading: (questionNumber: number, loading: boolean) => void;
 }
 
@@ -52,6 +53,8 @@ export const useQuizStore = create<QuizState>((set, get) => ({
       answers: {},
       result: null,
       error: null,
+      hints: {},
+      hintLoading: {},
     });
   },
 
@@ -118,6 +121,15 @@ export const useQuizStore = create<QuizState>((set, get) => ({
     }));
   },
 
+  setHints: (hints) => {
+    set((state) => ({
+      hints: {
+        ...hints,
+        ...state.hints,
+      },
+    }));
+  },
+
   setHintLoading: (questionNumber, loading) => {
     set((state) => ({
       hintLoading: {
@@ -5,12 +5,21 @@ export enum QuestionType {
   NAT_DECIMAL = 'nat_decimal',
 }
 
+export interface FigureImage {
+  src: string;
+  srcset: string;
+  fallback_srcset: string;
+  width: number;
+  height: number;
+}
+
 export interface Question {
   number: number;
   text: string;
   question_type: QuestionType;
   options: Record<string, string> | null;
   images?: string[]; 
+  figures?: FigureImage[] | null;
 }
 
 export interface QuizSession {
@@ -19,10 +28,17 @@ export interface QuizSession {
   total_questions: number;
 }
 
-export interface UploadResponse {
-  session_id: string;
-  total_questions: number;
-  message: string;
+export type JobStatus = 'queued' | 'running' | 'done' | 'failed';
+
+export interface JobResponse {
+  job_id: string;
+  status: JobStatus;
+  stage: string | null;
+  pages_done: number;
+  pages_total: number;
+  session_id: string | null;
+  total_questions: number | null;
+  error: string | null;
 }
 
 export interface AnswerSubmission {
@@ -58,3 +74,9 @@ export interface HintResponse {
   hint: string;
   cached: boolean;
 }
+
+export interface SessionHintsResponse {
+  session_id: string;
+  hints: HintResponse[];
+  missing: number[];
+}